@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Cache policy and preload headers for FitCalcs
+Writes a `_headers` file (Netlify / Cloudflare Pages format) next to the
+built pages. HTML and crawl files get a short TTL with revalidation, hashed
+assets are cached for a year as immutable, and every page gets Link
+preload/preconnect entries for the resources it loads, which lets the host
+send 103 Early Hints.
+"""
+
+import argparse
+import os
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+SCRIPT_DIR = Path(__file__).parent
+SITE_HOST = 'fitcalcs.xyz'
+
+HTML_CACHE = 'public, max-age=300, must-revalidate'
+CRAWL_CACHE = 'public, max-age=3600, must-revalidate'
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# Files served as-is that are not pages or assets
+CRAWL_FILES = ('robots.txt', 'sitemap.xml')
+
+# Build outputs and sources that are never deployed
+IGNORED = ('.build', '.git', '__pycache__')
+SOURCE_SUFFIXES = ('.py', '.pyc', '.jsonl', '.md')
+
+# Fingerprinted asset names such as app.3f9a1c2b.js
+HASHED_ASSET = re.compile(r'\.[0-9a-f]{8,}\.(?:js|css|png|jpe?g|gif|svg|webp|avif|woff2?)$')
+
+# URLs assigned from inline scripts, e.g. s.src='https://nap5k.com/tag.min.js'
+INLINE_SRC = re.compile(r"""\.src\s*=\s*['"](https?://[^'"]+)['"]""")
+
+
+class ResourceParser(HTMLParser):
+    """Collect the render-critical resources and third-party origins of a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.preloads = []
+        self.origins = []
+        self.in_head = False
+        self.in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'script':
+            self.in_script = 'src' not in attrs
+            src = attrs.get('src')
+            if src:
+                critical = self.in_head and 'async' not in attrs and 'defer' not in attrs
+                self._add(src, 'script', critical)
+        elif tag == 'link' and attrs.get('href'):
+            rel = (attrs.get('rel') or '').lower()
+            if rel == 'stylesheet':
+                self._add(attrs['href'], 'style', True)
+            elif rel in ('preconnect', 'dns-prefetch'):
+                self._add_origin(attrs['href'])
+        elif tag in ('iframe', 'img') and attrs.get('src'):
+            self._add(attrs['src'], None, False)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        elif tag == 'script':
+            self.in_script = False
+
+    def handle_data(self, data):
+        if self.in_script:
+            for url in INLINE_SRC.findall(data):
+                self._add_origin(url)
+
+    def _add(self, url, kind, critical):
+        parts = urlsplit(url)
+        if parts.scheme in ('http', 'https') and parts.hostname != SITE_HOST:
+            self._add_origin(url)
+        elif critical and kind and not parts.scheme and url:
+            entry = (url if url.startswith('/') else '/' + url, kind)
+            if entry not in self.preloads:
+                self.preloads.append(entry)
+
+    def _add_origin(self, url):
+        parts = urlsplit(url)
+        if parts.hostname and parts.hostname != SITE_HOST:
+            origin = f'{parts.scheme or "https"}://{parts.netloc}'
+            if origin not in self.origins:
+                self.origins.append(origin)
+
+
+def page_links(content):
+    """Return the Link header values for a page"""
+    parser = ResourceParser()
+    parser.feed(content)
+    parser.close()
+    links = [f'<{path}>; rel=preload; as={kind}' for path, kind in parser.preloads]
+    links += [f'<{origin}>; rel=preconnect' for origin in parser.origins]
+    return links
+
+
+def url_path(rel_path):
+    """Map a file path relative to the site root to its URL path"""
+    rel_path = rel_path.replace(os.sep, '/')
+    if rel_path == 'index.html':
+        return '/'
+    return '/' + rel_path
+
+
+def iter_site_files(site_dir):
+    """Yield deployable file paths relative to site_dir, in a stable order"""
+    for root, dirs, files in os.walk(site_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED and not d.startswith('.'))
+        for name in sorted(files):
+            rel_path = os.path.relpath(os.path.join(root, name), site_dir)
+            if not name.startswith('.') and not name.endswith(SOURCE_SUFFIXES):
+                yield rel_path
+
+
+def format_rule(path, headers):
+    lines = [path] + [f'  {name}: {value}' for name, value in headers]
+    return '\n'.join(lines) + '\n'
+
+
+def generate_headers(site_dir='.', contents=None):
+    """Write site_dir/_headers and return the number of rules written
+
+    contents maps site-relative page paths to page text the caller already
+    holds, such as the pipeline's catalog; other pages are read from disk.
+    """
+    contents = contents or {}
+    rules = []
+    # Pages in a subdirectory share a template, so they collapse into one
+    # splat rule when they all resolve to the same headers. Hosts merge
+    # overlapping rules, so mixed directories fall back to per-path rules.
+    directory_headers = {}
+
+    for rel_path in iter_site_files(site_dir):
+        name = os.path.basename(rel_path)
+        directory = os.path.dirname(rel_path)
+        if HASHED_ASSET.search(name):
+            rules.append((url_path(rel_path), [('Cache-Control', IMMUTABLE_CACHE)]))
+        elif name.endswith('.html'):
+            content = contents.get(rel_path.replace(os.sep, '/'))
+            if content is None:
+                with open(os.path.join(site_dir, rel_path), 'r', encoding='utf-8') as f:
+                    content = f.read()
+            links = page_links(content)
+            headers = [('Cache-Control', HTML_CACHE)] + [('Link', link) for link in links]
+            if directory:
+                directory_headers.setdefault(directory, {}).setdefault(tuple(headers), []).append(rel_path)
+            else:
+                rules.append((url_path(rel_path), headers))
+        elif rel_path in CRAWL_FILES or name.startswith('sitemap'):
+            rules.append((url_path(rel_path), [('Cache-Control', CRAWL_CACHE)]))
+
+    for directory, variants in sorted(directory_headers.items()):
+        if len(variants) == 1:
+            rules.append((url_path(directory) + '/*', list(next(iter(variants)))))
+            continue
+        for headers, paths in variants.items():
+            rules.extend((url_path(rel_path), list(headers)) for rel_path in paths)
+
+    with open(os.path.join(site_dir, '_headers'), 'w', encoding='utf-8') as f:
+        f.write('# Generated by cache-headers.py\n')
+        for path, headers in rules:
+            f.write(format_rule(path, headers))
+
+    print(f"Generated _headers ({len(rules)} rules)")
+    return len(rules)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Generate the _headers cache policy file')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR),
+                        help='directory containing the built site')
+    args = parser.parse_args()
+    generate_headers(args.site_dir)
+
+
+if __name__ == '__main__':
+    main()
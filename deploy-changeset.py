@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Deploy changeset for FitCalcs
+Compares the built site against the manifest (path, content hash, size) of
+the last deploy and writes the changeset plus matching upload and CDN purge
+lists, so a deploy only moves and invalidates what actually changed.
+
+    python deploy-changeset.py plan
+    python deploy-changeset.py deploy --target /tmp/fitcalcs-host
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from site_catalog import load_script
+
+SCRIPT_DIR = Path(__file__).parent
+SITE_URL = 'https://fitcalcs.xyz'
+
+BUILD_DIR = '.build'
+MANIFEST = 'deploy-manifest.json'
+CHANGESET = 'changeset.json'
+UPLOAD_LIST = 'upload.txt'
+PURGE_LIST = 'purge.txt'
+
+# Deployed host configuration that is never served as a URL
+HOST_CONFIG = ('_headers', 'CNAME')
+
+
+cache_headers = load_script('cache-headers.py')
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(site_dir, digests=None):
+    """Return {path: {'hash', 'size'}} for every deployable file
+
+    digests maps paths to SHA-256 hashes the caller already computed, such
+    as the pipeline's catalog digests; other files are hashed here.
+    """
+    digests = digests or {}
+    manifest = {}
+    for rel_path in cache_headers.iter_site_files(site_dir):
+        full_path = os.path.join(site_dir, rel_path)
+        path = rel_path.replace(os.sep, '/')
+        manifest[path] = {
+            'hash': digests.get(path) or file_hash(full_path),
+            'size': os.path.getsize(full_path),
+        }
+    return manifest
+
+
+def load_manifest(site_dir):
+    """Return the manifest of the last deploy, or an empty one"""
+    path = os.path.join(site_dir, BUILD_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(site_dir, manifest):
+    os.makedirs(os.path.join(site_dir, BUILD_DIR), exist_ok=True)
+    with open(os.path.join(site_dir, BUILD_DIR, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def diff_manifests(previous, current):
+    """Return the changeset between two manifests"""
+    changeset = {'added': [], 'modified': [], 'deleted': [], 'unchanged': []}
+    for path, entry in sorted(current.items()):
+        if path not in previous:
+            changeset['added'].append(path)
+        elif previous[path]['hash'] != entry['hash']:
+            changeset['modified'].append(path)
+        else:
+            changeset['unchanged'].append(path)
+    changeset['deleted'] = sorted(path for path in previous if path not in current)
+    return changeset
+
+
+def purge_urls(path):
+    """CDN URLs that serve a file"""
+    if path in HOST_CONFIG:
+        return []
+    if path == 'index.html':
+        return [f'{SITE_URL}/', f'{SITE_URL}/index.html']
+    return [f'{SITE_URL}/{path}']
+
+
+def plan(site_dir='.', digests=None):
+    """Write the changeset, upload and purge lists; return (changeset, manifest)"""
+    current = build_manifest(site_dir, digests)
+    changeset = diff_manifests(load_manifest(site_dir), current)
+    upload = changeset['added'] + changeset['modified']
+    # Added paths cannot be cached yet, so only changed and removed ones are purged
+    purge = [url for path in changeset['modified'] + changeset['deleted'] for url in purge_urls(path)]
+
+    build_dir = os.path.join(site_dir, BUILD_DIR)
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, CHANGESET), 'w', encoding='utf-8') as f:
+        json.dump(changeset, f, indent=1)
+    with open(os.path.join(build_dir, UPLOAD_LIST), 'w', encoding='utf-8') as f:
+        f.writelines(path + '\n' for path in upload)
+    with open(os.path.join(build_dir, PURGE_LIST), 'w', encoding='utf-8') as f:
+        f.writelines(url + '\n' for url in purge)
+
+    upload_bytes = sum(current[path]['size'] for path in upload)
+    print(f"Changeset: {len(changeset['added'])} added, {len(changeset['modified'])} modified, "
+          f"{len(changeset['deleted'])} deleted, {len(changeset['unchanged'])} unchanged")
+    print(f'Upload: {len(upload)} files ({upload_bytes:,} bytes), purge: {len(purge)} URLs')
+    return changeset, current
+
+
+def deploy(site_dir, target):
+    """Copy only changed files into target, remove deleted ones and record the manifest"""
+    start = time.perf_counter()
+    changeset, manifest = plan(site_dir)
+    moved = 0
+    for path in changeset['added'] + changeset['modified']:
+        destination = os.path.join(target, path)
+        os.makedirs(os.path.dirname(destination) or target, exist_ok=True)
+        shutil.copyfile(os.path.join(site_dir, path), destination)
+        moved += manifest[path]['size']
+    for path in changeset['deleted']:
+        destination = os.path.join(target, path)
+        if os.path.exists(destination):
+            os.remove(destination)
+    save_manifest(site_dir, manifest)
+    elapsed = time.perf_counter() - start
+    files = len(changeset['added']) + len(changeset['modified'])
+    print(f'Deployed {files} files ({moved:,} bytes) to {target} in {elapsed:.2f}s')
+    return moved
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Plan or run an incremental FitCalcs deploy')
+    sub = parser.add_subparsers(dest='command', required=True)
+    plan_parser = sub.add_parser('plan', help='write changeset, upload and purge lists')
+    plan_parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR))
+    deploy_parser = sub.add_parser('deploy', help='copy changed files into a local target directory')
+    deploy_parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR))
+    deploy_parser.add_argument('--target', required=True, help='directory standing in for the host')
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        plan(args.site_dir)
+    else:
+        deploy(args.site_dir, args.target)
+
+
+if __name__ == '__main__':
+    main()
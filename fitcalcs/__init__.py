@@ -0,0 +1,38 @@
+"""
+FitCalcs reference engine
+NumPy-vectorized versions of the calculator formulas that the pages run in
+the browser, for precomputing tables and validating formula changes.
+
+Requires NumPy. The parity harness (python -m fitcalcs.parity) also needs
+Node.js to run the page scripts.
+"""
+
+from fitcalcs.formulas import (
+    bmi,
+    bmi_category,
+    body_fat_navy,
+    bmr_harris_benedict,
+    bmr_katch_mcardle,
+    bmr_mifflin_st_jeor,
+    due_date,
+    healthy_weight_range,
+    one_rep_max,
+    running_pace,
+    tdee,
+    water_intake_oz,
+)
+
+__all__ = [
+    'bmi',
+    'bmi_category',
+    'body_fat_navy',
+    'bmr_harris_benedict',
+    'bmr_katch_mcardle',
+    'bmr_mifflin_st_jeor',
+    'due_date',
+    'healthy_weight_range',
+    'one_rep_max',
+    'running_pace',
+    'tdee',
+    'water_intake_oz',
+]
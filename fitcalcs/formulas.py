@@ -0,0 +1,186 @@
+"""
+Vectorized calculator formulas
+Each function mirrors the JS of the named page and accepts scalars or
+NumPy arrays; array arguments are broadcast against each other, so a grid
+of inputs is evaluated in a single call.
+"""
+
+import numpy as np
+
+# Activity multipliers offered by tdee-calculator.html
+TDEE_ACTIVITY = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'active': 1.725,
+    'very_active': 1.9,
+}
+
+# Multipliers offered by water-intake-calculator.html
+WATER_ACTIVITY = {
+    'sedentary': 1.0,
+    'light': 1.1,
+    'moderate': 1.2,
+    'active': 1.3,
+    'very_active': 1.5,
+}
+WATER_CLIMATE = {
+    'cold': 0.9,
+    'moderate': 1.0,
+    'hot': 1.2,
+}
+
+BMI_CATEGORIES = np.array(['Underweight', 'Normal Weight', 'Overweight', 'Obese'])
+
+KM_PER_MILE = 1.60934
+LB_PER_KG = 2.205
+
+
+def js_round(values):
+    """Round half up, like JavaScript's Math.round"""
+    return np.floor(np.asarray(values, dtype=float) + 0.5)
+
+
+def _lookup(values, table):
+    """Map option names (or numeric multipliers) to multipliers"""
+    values = np.asarray(values)
+    if values.dtype.kind not in 'US':
+        return values.astype(float)
+    names, inverse = np.unique(values, return_inverse=True)
+    try:
+        factors = np.array([table[name] for name in names], dtype=float)
+    except KeyError as exc:
+        raise ValueError(f'unknown option {exc.args[0]!r}; expected one of {sorted(table)}') from None
+    return factors[inverse].reshape(values.shape)
+
+
+def _is_male(gender):
+    gender = np.asarray(gender)
+    if gender.dtype.kind in 'US':
+        return gender == 'male'
+    return gender.astype(bool)
+
+
+# --- bmi-calculator.html ---------------------------------------------------
+
+def bmi(weight_lb, height_in):
+    """Body Mass Index from pounds and inches"""
+    height_in = np.asarray(height_in, dtype=float)
+    return np.asarray(weight_lb, dtype=float) / (height_in * height_in) * 703
+
+
+def bmi_category(bmi_values):
+    """Category label for each BMI value"""
+    index = np.searchsorted([18.5, 25, 30], np.asarray(bmi_values, dtype=float), side='right')
+    return BMI_CATEGORIES[index]
+
+
+def healthy_weight_range(height_in):
+    """Return (healthy min, healthy max, ideal) weights in pounds"""
+    h2 = np.asarray(height_in, dtype=float) ** 2
+    return 18.5 / 703 * h2, 24.9 / 703 * h2, 21.7 / 703 * h2
+
+
+# --- tdee-calculator.html --------------------------------------------------
+
+def bmr_mifflin_st_jeor(weight_lb, height_in, age, gender):
+    """Mifflin-St Jeor BMR; gender is 'male'/'female' or a boolean is-male array"""
+    weight_kg = np.asarray(weight_lb, dtype=float) * 0.453592
+    height_cm = np.asarray(height_in, dtype=float) * 2.54
+    base = 10 * weight_kg + 6.25 * height_cm - 5 * np.asarray(age, dtype=float)
+    return base + np.where(_is_male(gender), 5, -161)
+
+
+def bmr_harris_benedict(weight_lb, height_in, age, gender):
+    """Revised Harris-Benedict BMR"""
+    weight_kg = np.asarray(weight_lb, dtype=float) * 0.453592
+    height_cm = np.asarray(height_in, dtype=float) * 2.54
+    age = np.asarray(age, dtype=float)
+    male = 88.362 + 13.397 * weight_kg + 4.799 * height_cm - 5.677 * age
+    female = 447.593 + 9.247 * weight_kg + 3.098 * height_cm - 4.330 * age
+    return np.where(_is_male(gender), male, female)
+
+
+def bmr_katch_mcardle(weight_lb, body_fat_pct):
+    """Katch-McArdle BMR from lean body mass"""
+    weight_kg = np.asarray(weight_lb, dtype=float) * 0.453592
+    return 370 + 21.6 * weight_kg * (1 - np.asarray(body_fat_pct, dtype=float) / 100)
+
+
+def tdee(bmr_values, activity):
+    """Total daily energy expenditure; activity is a name from TDEE_ACTIVITY or a multiplier"""
+    return np.asarray(bmr_values, dtype=float) * _lookup(activity, TDEE_ACTIVITY)
+
+
+# --- body-fat-calculator.html ----------------------------------------------
+
+def body_fat_navy(gender, height_in, neck_in, waist_in, hip_in=0):
+    """U.S. Navy body fat percentage, clipped to 0-60 like the page"""
+    height = np.log10(np.asarray(height_in, dtype=float))
+    neck = np.asarray(neck_in, dtype=float)
+    waist = np.asarray(waist_in, dtype=float)
+    hip = np.asarray(hip_in, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        male = 495 / (1.0324 - 0.19077 * np.log10(waist - neck) + 0.15456 * height) - 450
+        female = 495 / (1.29579 - 0.35004 * np.log10(waist + hip - neck) + 0.22100 * height) - 450
+    return np.clip(np.where(_is_male(gender), male, female), 0, 60)
+
+
+# --- one-rep-max-calculator.html -------------------------------------------
+
+def one_rep_max(weight, reps, formula='average'):
+    """Estimated one-rep max; formula is brzycki, epley, lander, lombardi or average"""
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimates = {
+            'brzycki': weight * (36 / (37 - reps)),
+            'epley': weight * (1 + reps / 30),
+            'lander': 100 * weight / (101.3 - 2.67123 * reps),
+            'lombardi': weight * reps ** 0.1,
+        }
+    if formula == 'average':
+        result = sum(estimates.values()) / 4
+    elif formula in estimates:
+        result = estimates[formula]
+    else:
+        raise ValueError(f'unknown formula {formula!r}')
+    # Every formula returns the lifted weight for a single rep
+    return np.where(reps == 1, weight, result)
+
+
+# --- running-pace-calculator.html ------------------------------------------
+
+def running_pace(total_seconds, distance_km):
+    """Return (seconds per km, seconds per mile, km/h) for a finish time and distance"""
+    total_seconds = np.asarray(total_seconds, dtype=float)
+    distance_km = np.asarray(distance_km, dtype=float)
+    valid = distance_km > 0
+    safe_distance = np.where(valid, distance_km, 1)
+    per_km = np.where(valid, total_seconds / safe_distance, 0)
+    safe_seconds = np.where(total_seconds > 0, total_seconds, 1)
+    speed = np.where(valid & (total_seconds > 0), distance_km / safe_seconds * 3600, 0)
+    return per_km, per_km * KM_PER_MILE, speed
+
+
+# --- pregnancy-due-date-calculator.html ------------------------------------
+
+def due_date(lmp, from_conception=False):
+    """Due date 280 days after the last menstrual period (datetime64[D] arrays)
+
+    With from_conception=True the dates are conception dates, which the page
+    places 14 days after the LMP.
+    """
+    lmp = np.asarray(lmp, dtype='datetime64[D]')
+    if from_conception:
+        lmp = lmp - np.timedelta64(14, 'D')
+    return lmp + np.timedelta64(280, 'D')
+
+
+# --- water-intake-calculator.html ------------------------------------------
+
+def water_intake_oz(weight, activity='moderate', climate='moderate', unit='lbs'):
+    """Daily water intake in ounces, rounded like the page"""
+    weight = np.asarray(weight, dtype=float)
+    weight = np.where(np.asarray(unit) == 'kg', weight * LB_PER_KG, weight)
+    return js_round(weight * 0.5 * _lookup(activity, WATER_ACTIVITY) * _lookup(climate, WATER_CLIMATE))
@@ -0,0 +1,299 @@
+"""
+JS/Python parity harness
+Runs each calculator page's own inline script in Node.js against a minimal
+DOM shim, feeds it randomized inputs, and checks the displayed results
+against fitcalcs.formulas.
+
+    python -m fitcalcs.parity                # parity check, 500 cases per page
+    python -m fitcalcs.parity --bench 1000000
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from fitcalcs import formulas
+
+SITE_DIR = Path(__file__).resolve().parent.parent
+
+# Evaluates the page script once, then sets inputs, calls the page's
+# calculate function and reads the output elements for every case.
+NODE_RUNNER = r'''
+const vm = require('vm');
+const data = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const els = {};
+const noop = () => {};
+function el(id) {
+    if (!els[id]) {
+        els[id] = {
+            id, value: '', textContent: '', innerHTML: '', className: '', style: {},
+            classList: {add: noop, remove: noop, toggle: noop, contains: () => false},
+            addEventListener: noop, appendChild: noop,
+            set valueAsDate(d) { this.value = d.toISOString().slice(0, 10); },
+        };
+    }
+    return els[id];
+}
+global.window = global;
+global.document = {
+    getElementById: el, querySelector: () => null, querySelectorAll: () => [],
+    createElement: () => el('__created'), addEventListener: noop, body: el('__body'),
+    documentElement: el('__html'),
+};
+global.event = {target: el('__event'), currentTarget: el('__event')};
+function apply(c) {
+    for (const [id, v] of Object.entries(c.inputs)) el(id).value = String(v);
+    for (const [name, v] of Object.entries(c.globals || {})) vm.runInThisContext(name + ' = ' + JSON.stringify(v));
+}
+apply(data.cases[0]);
+vm.runInThisContext(data.script);
+const results = data.cases.map(c => {
+    apply(c);
+    vm.runInThisContext(data.call);
+    return data.outputs.map(id => el(id).textContent);
+});
+process.stdout.write(JSON.stringify(results));
+'''
+
+PAGE_SCRIPT = re.compile(r'<script>(.*?)</script>', re.DOTALL)
+
+
+def page_script(page):
+    """Return the calculator's own inline JS, without ad loaders or beacons"""
+    with open(SITE_DIR / page, 'r', encoding='utf-8') as f:
+        content = f.read()
+    blocks = [block for block in PAGE_SCRIPT.findall(content)
+              if 'dataset.zone' not in block and 'sendBeacon' not in block]
+    return '\n'.join(blocks)
+
+
+def run_page(page, call, outputs, cases):
+    """Run the page JS for every case and return the output texts"""
+    payload = json.dumps({'script': page_script(page), 'call': call, 'outputs': outputs, 'cases': cases})
+    env = dict(os.environ, TZ='UTC')
+    result = subprocess.run(['node', '-e', NODE_RUNNER], input=payload, capture_output=True,
+                            text=True, env=env, check=True)
+    return json.loads(result.stdout)
+
+
+def parse_number(text):
+    """Parse the first number in a displayed value, e.g. '1,234 lbs'"""
+    if 'NaN' in text:
+        return float('nan')
+    match = re.search(r'-?[\d,]*\.?\d+', text)
+    return float(match.group(0).replace(',', '')) if match else float('nan')
+
+
+def parse_duration(text):
+    """Parse h:mm:ss or m:ss into seconds"""
+    seconds = 0
+    for part in text.split()[0].split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def parse_date(text):
+    return np.datetime64(datetime.strptime(text, '%b %d, %Y').date())
+
+
+def choice(rng, options, n):
+    return rng.choice(np.array(options), n)
+
+
+# Each check returns (page, call, outputs, cases, expected) where expected maps
+# an output id to (parser, engine values, tolerance).
+
+def check_bmi(rng, n):
+    feet = rng.integers(4, 7, n)
+    # The page treats 0 inches as missing input, so the grid starts at 1
+    inches = rng.integers(1, 12, n)
+    pounds = rng.integers(80, 401, n)
+    height = feet * 12 + inches
+    low, high, ideal = formulas.healthy_weight_range(height)
+    cases = [{'inputs': {'feet': int(f), 'inches': int(i), 'pounds': int(p)}}
+             for f, i, p in zip(feet, inches, pounds)]
+    expected = {
+        'bmiValue': (parse_number, formulas.bmi(pounds, height), 0.05),
+        'bmiCategory': (str, formulas.bmi_category(formulas.bmi(pounds, height)), None),
+        'healthyMin': (parse_number, low, 0.5),
+        'healthyMax': (parse_number, high, 0.5),
+        'idealWeight': (parse_number, ideal, 0.5),
+    }
+    return 'bmi-calculator.html', 'calculate()', cases, expected
+
+
+def check_tdee(rng, n):
+    age = rng.integers(18, 81, n)
+    gender = choice(rng, ['male', 'female'], n)
+    weight = rng.integers(100, 351, n)
+    feet = rng.integers(4, 7, n)
+    inches = rng.integers(1, 12, n)
+    formula = choice(rng, ['mifflin', 'harris', 'katch'], n)
+    body_fat = rng.integers(8, 40, n)
+    activity = choice(rng, list(formulas.TDEE_ACTIVITY), n)
+    height = feet * 12 + inches
+    bmr = np.select(
+        [formula == 'mifflin', formula == 'harris'],
+        [formulas.bmr_mifflin_st_jeor(weight, height, age, gender),
+         formulas.bmr_harris_benedict(weight, height, age, gender)],
+        formulas.bmr_katch_mcardle(weight, body_fat),
+    )
+    cases = [{
+        'inputs': {'age': int(a), 'gender': g, 'weight': int(w), 'feet': int(f), 'inches': int(i),
+                   'formula': fm, 'bodyFat': int(bf)},
+        'globals': {'activityMultiplier': formulas.TDEE_ACTIVITY[act]},
+    } for a, g, w, f, i, fm, bf, act in zip(age, gender, weight, feet, inches, formula, body_fat, activity)]
+    expected = {
+        'bmr': (parse_number, bmr, 0.5),
+        'tdee': (parse_number, formulas.tdee(bmr, activity), 0.5),
+    }
+    return 'tdee-calculator.html', 'calculate()', cases, expected
+
+
+def check_body_fat(rng, n):
+    gender = choice(rng, ['male', 'female'], n)
+    height = rng.integers(58, 81, n)
+    neck = rng.integers(24, 41, n) / 2
+    waist = rng.integers(52, 101, n) / 2
+    hip = rng.integers(60, 111, n) / 2
+    cases = [{'inputs': {'gender': g, 'height': int(h), 'weight': 180, 'neck': float(nk),
+                         'waist': float(w), 'hip': float(hp)}}
+             for g, h, nk, w, hp in zip(gender, height, neck, waist, hip)]
+    expected = {'bodyFat': (parse_number, formulas.body_fat_navy(gender, height, neck, waist, hip), 0.05)}
+    return 'body-fat-calculator.html', 'calculate()', cases, expected
+
+
+def check_one_rep_max(rng, n):
+    weight = rng.integers(9, 101, n) * 5
+    reps = rng.integers(1, 16, n)
+    formula = choice(rng, ['brzycki', 'epley', 'lander', 'lombardi', 'average'], n)
+    one_rm = np.empty(n)
+    for name in np.unique(formula):
+        mask = formula == name
+        one_rm[mask] = formulas.one_rep_max(weight[mask], reps[mask], name)
+    cases = [{'inputs': {'weight': int(w), 'reps': int(r), 'unit': 'lbs', 'formula': f}}
+             for w, r, f in zip(weight, reps, formula)]
+    expected = {
+        'oneRepMax': (parse_number, one_rm, 0.5),
+        'brzycki1rm': (parse_number, formulas.one_rep_max(weight, reps, 'brzycki'), 0.5),
+        'epley1rm': (parse_number, formulas.one_rep_max(weight, reps, 'epley'), 0.5),
+        'lander1rm': (parse_number, formulas.one_rep_max(weight, reps, 'lander'), 0.5),
+    }
+    return 'one-rep-max-calculator.html', 'calculate()', cases, expected
+
+
+def check_pace(rng, n):
+    hours = rng.integers(0, 6, n)
+    minutes = rng.integers(0, 60, n)
+    seconds = rng.integers(0, 60, n)
+    distance = choice(rng, ['5', '10', '21.0975', '42.195', '1.60934'], n)
+    total = hours * 3600 + minutes * 60 + seconds
+    per_km, per_mile, speed = formulas.running_pace(total, distance.astype(float))
+    cases = [{'inputs': {'hours': int(h), 'minutes': int(m), 'seconds': int(s), 'distance': d}}
+             for h, m, s, d in zip(hours, minutes, seconds, distance)]
+    # The page floors paces to whole seconds
+    expected = {
+        'pace': (parse_duration, np.floor(per_km), 1),
+        'paceMile': (parse_duration, np.floor(per_mile), 1),
+        'speed': (parse_number, speed, 0.05),
+    }
+    return 'running-pace-calculator.html', 'calcPace()', cases, expected
+
+
+def check_due_date(rng, n):
+    lmp = np.datetime64('2020-01-01') + rng.integers(0, 3650, n).astype('timedelta64[D]')
+    cases = [{'inputs': {'lmpDate': str(d)}} for d in lmp]
+    expected = {'dueDate': (parse_date, formulas.due_date(lmp), None)}
+    return 'pregnancy-due-date-calculator.html', 'calculate()', cases, expected
+
+
+def check_water(rng, n):
+    weight = rng.integers(80, 351, n)
+    unit = choice(rng, ['lbs', 'kg'], n)
+    activity = choice(rng, list(formulas.WATER_ACTIVITY), n)
+    climate = choice(rng, list(formulas.WATER_CLIMATE), n)
+    cases = [{'inputs': {'weight': int(w), 'unit': u, 'activity': a, 'climate': c}}
+             for w, u, a, c in zip(weight, unit, activity, climate)]
+    expected = {'dailyOz': (parse_number, formulas.water_intake_oz(weight, activity, climate, unit), 0)}
+    return 'water-intake-calculator.html', 'calculate()', cases, expected
+
+
+CHECKS = [check_bmi, check_tdee, check_body_fat, check_one_rep_max, check_pace, check_due_date, check_water]
+
+
+def values_match(actual, expected, tolerance):
+    if tolerance is None:
+        return actual == expected
+    if np.isnan(actual) or np.isnan(expected):
+        return bool(np.isnan(actual) and np.isnan(expected))
+    return abs(actual - expected) <= tolerance + 1e-9
+
+
+def run_parity(cases_per_page=500, seed=0):
+    """Compare page JS and engine outputs; return the number of mismatches"""
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for check in CHECKS:
+        page, call, cases, expected = check(rng, cases_per_page)
+        outputs = list(expected)
+        results = run_page(page, call, outputs, cases)
+        page_mismatches = 0
+        for index, row in enumerate(results):
+            for output, text in zip(outputs, row):
+                parser, values, tolerance = expected[output]
+                if not values_match(parser(text), values[index], tolerance):
+                    if page_mismatches < 5:
+                        print(f'  {page} #{index} {output}: js={text!r} python={values[index]!r} inputs={cases[index]}')
+                    page_mismatches += 1
+        status = 'OK' if not page_mismatches else f'{page_mismatches} mismatches'
+        print(f'{page:<40} {len(cases)} cases  {status}')
+        mismatches += page_mismatches
+    return mismatches
+
+
+def run_bench(n, seed=0):
+    """Time each formula over n random input combinations"""
+    rng = np.random.default_rng(seed)
+    weight = rng.uniform(90, 350, n)
+    height = rng.uniform(58, 80, n)
+    age = rng.integers(18, 81, n)
+    gender = rng.random(n) < 0.5
+    benches = [
+        ('bmi', lambda: formulas.bmi(weight, height)),
+        ('bmr_mifflin_st_jeor', lambda: formulas.bmr_mifflin_st_jeor(weight, height, age, gender)),
+        ('tdee', lambda: formulas.tdee(formulas.bmr_harris_benedict(weight, height, age, gender), 1.55)),
+        ('body_fat_navy', lambda: formulas.body_fat_navy(gender, height, height / 4.5, height / 2, height / 1.8)),
+        ('one_rep_max', lambda: formulas.one_rep_max(weight, age % 15 + 1)),
+        ('running_pace', lambda: formulas.running_pace(weight * 30, 42.195)),
+        ('due_date', lambda: formulas.due_date(np.datetime64('2025-01-01') + age.astype('timedelta64[D]'))),
+        ('water_intake_oz', lambda: formulas.water_intake_oz(weight, 1.2, 1.0)),
+    ]
+    for name, bench in benches:
+        start = time.perf_counter()
+        bench()
+        elapsed = time.perf_counter() - start
+        print(f'{name:<22} {n / elapsed / 1e6:8.1f} M evaluations/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check calculator JS against the Python engine')
+    parser.add_argument('--cases', type=int, default=500, help='random cases per page')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark the engine on N inputs instead')
+    args = parser.parse_args()
+    if args.bench:
+        run_bench(args.bench, args.seed)
+        return
+    sys.exit(1 if run_parity(args.cases, args.seed) else 0)
+
+
+if __name__ == '__main__':
+    main()
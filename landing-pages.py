@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Programmatic landing page generator for FitCalcs
+Streams precomputed calculator variants (BMI for a height and weight, TDEE
+for an age and sex, pace for a race finish time) from parameter grids into
+the same head, meta and JSON-LD generation used by seo-optimizer.py.
+
+Variants are produced lazily and written one page at a time, so memory use
+does not grow with the number of pages. Work is split into shards that run
+as separate processes; each shard streams its own sitemap and link graph
+files, and the parent process only writes a small sitemap index.
+"""
+
+import argparse
+import itertools
+import os
+import re
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from site_catalog import load_script
+
+SCRIPT_DIR = Path(__file__).parent
+SITE_URL = 'https://fitcalcs.xyz'
+
+# Sitemap protocol limit per file
+SITEMAP_MAX_URLS = 50000
+
+# Sitemap index listed in robots.txt, and the prefix of the shard sitemaps
+SITEMAP_INDEX = 'sitemap-landing.xml'
+SITEMAP_PREFIX = 'sitemap-landing-'
+
+# Build artifacts that are not deployed
+BUILD_DIR = '.build'
+LINKS_PREFIX = 'landing-links-'
+
+# Inline style for precomputed result tables
+TABLE_ATTRS = 'style="width: 100%; margin-top: 15px; text-align: left; color: var(--text-secondary);"'
+
+
+optimizer = load_script('seo-optimizer.py')
+rum = load_script('rum-monitor.py')
+
+
+def format_height(inches):
+    """Format a height in inches as '5 ft 10 in'"""
+    return f'{inches // 12} ft {inches % 12} in'
+
+
+def format_time(total_seconds):
+    """Format seconds as h:mm:ss or m:ss, matching the pace page"""
+    total_seconds = int(total_seconds)
+    h, rem = divmod(total_seconds, 3600)
+    m, s = divmod(rem, 60)
+    if h > 0:
+        return f'{h}:{m:02d}:{s:02d}'
+    return f'{m}:{s:02d}'
+
+
+def time_slug(total_seconds):
+    """Format seconds for use in a URL, e.g. 3h30m00s"""
+    h, rem = divmod(int(total_seconds), 3600)
+    m, s = divmod(rem, 60)
+    return f'{h}h{m:02d}m{s:02d}s' if h else f'{m}m{s:02d}s'
+
+
+# --- BMI -------------------------------------------------------------------
+
+BMI_HEIGHTS = range(58, 81)          # 4 ft 10 in to 6 ft 8 in
+BMI_WEIGHTS = range(90, 351)         # pounds
+
+
+def bmi_category(bmi):
+    """Return the BMI category label used by the BMI page"""
+    if bmi < 18.5:
+        return 'Underweight'
+    if bmi < 25:
+        return 'Normal Weight'
+    if bmi < 30:
+        return 'Overweight'
+    return 'Obese'
+
+
+def bmi_slug(height, weight):
+    return f'{height // 12}ft-{height % 12}in-{weight}lb'
+
+
+def iter_bmi_variants():
+    """Yield BMI variants for every height and weight in the grid"""
+    for height, weight in itertools.product(BMI_HEIGHTS, BMI_WEIGHTS):
+        bmi = weight / (height * height) * 703
+        category = bmi_category(bmi)
+        healthy_min = 18.5 / 703 * height * height
+        healthy_max = 24.9 / 703 * height * height
+        label = f'{format_height(height)}, {weight} lb'
+        neighbors = [
+            bmi_slug(h, w) for h, w in ((height, weight - 5), (height, weight + 5), (height - 1, weight), (height + 1, weight))
+            if h in BMI_HEIGHTS and w in BMI_WEIGHTS
+        ]
+        yield {
+            'parent': 'bmi-calculator.html',
+            'slug': bmi_slug(height, weight),
+            'name': f'BMI for {label}',
+            'title': f'BMI for {label} - {bmi:.1f} ({category}) | FitCalcs',
+            'description': f'A person who is {format_height(height)} tall and weighs {weight} lb has a BMI of {bmi:.1f}, which is {category.lower()}. The healthy weight range for this height is {healthy_min:.0f}-{healthy_max:.0f} lb.',
+            'inputs': {'feet': height // 12, 'inches': height % 12, 'pounds': weight},
+            'neighbors': neighbors,
+        }
+
+
+# --- TDEE ------------------------------------------------------------------
+
+TDEE_AGES = range(18, 81)
+TDEE_WEIGHTS = range(120, 281, 20)
+# Reference heights in inches used for the weight table
+TDEE_HEIGHTS = {'male': 70, 'female': 64}
+TDEE_ACTIVITY = [
+    ('Sedentary', 1.2),
+    ('Light', 1.375),
+    ('Moderate', 1.55),
+    ('Active', 1.725),
+    ('Very Active', 1.9),
+]
+
+
+def mifflin_bmr(gender, age, weight_lb, height_in):
+    """Mifflin-St Jeor BMR, matching the TDEE page"""
+    weight_kg = weight_lb * 0.453592
+    height_cm = height_in * 2.54
+    bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age
+    return bmr + 5 if gender == 'male' else bmr - 161
+
+
+def tdee_slug(age, gender):
+    return f'{age}-year-old-{gender}'
+
+
+def iter_tdee_variants():
+    """Yield a TDEE chart variant for every age and sex"""
+    for age, gender in itertools.product(TDEE_AGES, ('male', 'female')):
+        height = TDEE_HEIGHTS[gender]
+        header = ''.join(f'<th>{label}</th>' for label, _ in TDEE_ACTIVITY)
+        rows = []
+        for weight in TDEE_WEIGHTS:
+            bmr = mifflin_bmr(gender, age, weight, height)
+            cells = ''.join(f'<td>{round(bmr * factor):,}</td>' for _, factor in TDEE_ACTIVITY)
+            rows.append(f'<tr><td>{weight} lb</td>{cells}</tr>')
+        table = f'<table {TABLE_ATTRS}><tr><th>Weight</th>{header}</tr>{"".join(rows)}</table>'
+        other = 'female' if gender == 'male' else 'male'
+        neighbors = [tdee_slug(age, other)] + [tdee_slug(a, gender) for a in (age - 1, age + 1) if a in TDEE_AGES]
+        label = f'{age}-Year-Old {gender.title()}'
+        yield {
+            'parent': 'tdee-calculator.html',
+            'slug': tdee_slug(age, gender),
+            'name': f'TDEE for a {label}',
+            'title': f'TDEE for a {label} - Daily Calorie Chart | FitCalcs',
+            'description': f'Daily calorie needs (TDEE) for a {age}-year-old {gender} at {format_height(height)} by body weight and activity level. Calculated with the Mifflin-St Jeor equation.',
+            'inputs': {'age': age, 'gender': gender, 'feet': height // 12, 'inches': height % 12},
+            'table': table,
+            'neighbors': neighbors,
+        }
+
+
+# --- Running pace ----------------------------------------------------------
+
+# (label, slug, distance in km as used by the page, min seconds, max seconds, step)
+PACE_RACES = [
+    ('1 Mile', 'mile', '1.60934', 4 * 60, 15 * 60, 5),
+    ('5K', '5k', '5', 14 * 60, 60 * 60, 15),
+    ('10K', '10k', '10', 30 * 60, 100 * 60, 30),
+    ('Half Marathon', 'half-marathon', '21.0975', 65 * 60, 210 * 60, 30),
+    ('Marathon', 'marathon', '42.195', 130 * 60, 420 * 60, 60),
+]
+
+
+def pace_slug(race_slug, seconds):
+    return f'{race_slug}-in-{time_slug(seconds)}'
+
+
+def iter_pace_variants():
+    """Yield a pace chart variant for every race distance and finish time"""
+    for label, race_slug, distance, low, high, step in PACE_RACES:
+        km = float(distance)
+        for seconds in range(low, high + 1, step):
+            per_km = seconds / km
+            per_mile = per_km * 1.60934
+            split_step = 1 if km <= 10 else 5
+            rows = ''.join(
+                f'<tr><td>{split} km</td><td>{format_time(per_km * split)}</td></tr>'
+                for split in range(split_step, int(km) + 1, split_step)
+            ) + f'<tr><td>Finish</td><td>{format_time(seconds)}</td></tr>'
+            neighbors = [pace_slug(race_slug, s) for s in (seconds - step, seconds + step) if low <= s <= high]
+            h, rem = divmod(seconds, 3600)
+            m, s = divmod(rem, 60)
+            yield {
+                'parent': 'running-pace-calculator.html',
+                'slug': pace_slug(race_slug, seconds),
+                'name': f'{label} in {format_time(seconds)} Pace',
+                'title': f'{label} in {format_time(seconds)} - Pace Chart | FitCalcs',
+                'description': f'To run a {label.lower()} in {format_time(seconds)} you need a pace of {format_time(per_km)} per km ({format_time(per_mile)} per mile). Includes split times.',
+                'inputs': {'hours': h, 'minutes': m, 'seconds': s, 'distance': distance},
+                'table': f'<table {TABLE_ATTRS}><tr><th>Split</th><th>Time</th></tr>{rows}</table>',
+                'neighbors': neighbors,
+            }
+
+
+VARIANT_GRIDS = [iter_bmi_variants, iter_tdee_variants, iter_pace_variants]
+
+
+def landing_dirs():
+    """Return the output directory of each variant grid, named after its parent page"""
+    return [next(grid())['parent'][:-len('.html')] for grid in VARIANT_GRIDS]
+
+
+def iter_variants(shard=0, shard_count=1):
+    """Stream the variants belonging to one shard, in a stable order"""
+    variants = itertools.chain.from_iterable(grid() for grid in VARIANT_GRIDS)
+    return itertools.islice(variants, shard, None, shard_count)
+
+
+# --- Rendering -------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def load_template(site_dir, parent):
+    """Read a parent calculator page once per process"""
+    with open(os.path.join(site_dir, parent), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def variant_path(variant):
+    """Return the site-relative output path of a variant page"""
+    return f"{variant['parent'][:-len('.html')]}/{variant['slug']}.html"
+
+
+def set_input_values(content, inputs):
+    """Preset the calculator inputs so the page renders the variant on load"""
+    for field, value in inputs.items():
+        select = re.search(rf'<select id="{field}"[^>]*>.*?</select>', content, re.DOTALL)
+        if select:
+            options = select.group(0).replace(' selected>', '>')
+            options = options.replace(f'<option value="{value}">', f'<option value="{value}" selected>')
+            content = content[:select.start()] + options + content[select.end():]
+        else:
+            content = re.sub(rf'(<input [^>]*id="{field}" value=")[^"]*(")', rf'\g<1>{value}\g<2>', content, count=1)
+    return content
+
+
+def render_variant(variant, template, rum_endpoint=None, rum_sample_rate=rum.DEFAULT_SAMPLE_RATE):
+    """Render a variant page from its parent calculator page
+
+    The head is rebuilt, so the RUM beacon is added again when rum_endpoint
+    is set.
+    """
+    path = variant_path(variant)
+    parent_seo = optimizer.get_seo_data(variant['parent'])
+    seo_data = dict(parent_seo, name=variant['name'], title=variant['title'], description=variant['description'],
+                    parent=variant['parent'])
+
+    content = optimizer.rewrite_head(path, template, seo_data, include_keywords=False)
+    # Relative links in the parent page point at the site root
+    content = content.replace('<head>', '<head>\n    <base href="/">', 1)
+    if rum_endpoint:
+        content = rum.inject_beacon(content, rum_endpoint, rum_sample_rate)
+    content = set_input_values(content, variant['inputs'])
+    content = re.sub(r'<h1>[^<]*</h1>', lambda m: f"<h1>{variant['name']}</h1>", content, count=1)
+    content = re.sub(r'(<li style="color: var\(--text-primary\);">)[^<]*(</li>)',
+                     lambda m: f'{m.group(1)}<a href="{variant["parent"]}" style="color: var(--text-secondary); text-decoration: none;">'
+                               f'{optimizer.get_calculator_name(variant["parent"])}</a> / {variant["name"]}{m.group(2)}',
+                     content, count=1)
+
+    related = ''.join(
+        f'<a href="{variant["parent"][:-len(".html")]}/{slug}.html" class="related-link">{slug.replace("-", " ")}</a>'
+        for slug in variant['neighbors']
+    )
+    card = f'''
+            <div class="card">
+                <h2>{variant['name']}</h2>
+                <p style="color: var(--text-secondary); line-height: 1.6;">{variant['description']}</p>
+                {variant.get('table', '')}
+                <div class="related-tools" style="margin-top: 15px;">{related}</div>
+            </div>'''
+    return content.replace('<div class="content-area">', '<div class="content-area">' + card, 1)
+
+
+def sitemap_url(path, today):
+    return f'''    <url>
+        <loc>{SITE_URL}/{path}</loc>
+        <lastmod>{today}</lastmod>
+        <changefreq>monthly</changefreq>
+        <priority>0.6</priority>
+    </url>
+'''
+
+
+class ShardSitemap:
+    """Streams sitemap entries to disk, starting a new file every SITEMAP_MAX_URLS"""
+
+    def __init__(self, site_dir, shard):
+        self.site_dir = site_dir
+        self.shard = shard
+        self.today = datetime.now().strftime('%Y-%m-%d')
+        self.files = []
+        self.count = 0
+        self.handle = None
+
+    def add(self, path):
+        if self.count % SITEMAP_MAX_URLS == 0:
+            self._open_next()
+        self.handle.write(sitemap_url(path, self.today))
+        self.count += 1
+
+    def _open_next(self):
+        self.close()
+        name = f'{SITEMAP_PREFIX}{self.shard}-{len(self.files)}.xml'
+        self.files.append(name)
+        self.handle = open(os.path.join(self.site_dir, name), 'w', encoding='utf-8')
+        self.handle.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+
+    def close(self):
+        if self.handle:
+            self.handle.write('</urlset>')
+            self.handle.close()
+            self.handle = None
+
+
+def build_shard(site_dir, shard, shard_count, rum_endpoint=None, rum_sample_rate=rum.DEFAULT_SAMPLE_RATE):
+    """Render every variant in one shard, streaming pages, sitemap and link graph"""
+    os.makedirs(os.path.join(site_dir, BUILD_DIR), exist_ok=True)
+    sitemap = ShardSitemap(site_dir, shard)
+    links_path = os.path.join(site_dir, BUILD_DIR, f'{LINKS_PREFIX}{shard}.tsv')
+    count = 0
+    with open(links_path, 'w', encoding='utf-8') as links:
+        for variant in iter_variants(shard, shard_count):
+            path = variant_path(variant)
+            out_path = os.path.join(site_dir, path)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            content = render_variant(variant, load_template(site_dir, variant['parent']),
+                                     rum_endpoint, rum_sample_rate)
+            with open(out_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+            sitemap.add(path)
+            base = variant['parent'][:-len('.html')]
+            links.write(f"{path}\t{variant['parent']}\n")
+            for slug in variant['neighbors']:
+                links.write(f'{path}\t{base}/{slug}.html\n')
+            count += 1
+    sitemap.close()
+    print(f'Shard {shard}/{shard_count}: {count} pages')
+    return count
+
+
+def write_sitemap_index(site_dir):
+    """Write the sitemap index over every shard sitemap present in site_dir"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    names = sorted(name for name in os.listdir(site_dir)
+                   if name.startswith(SITEMAP_PREFIX) and name.endswith('.xml'))
+    entries = ''.join(f'''    <sitemap>
+        <loc>{SITE_URL}/{name}</loc>
+        <lastmod>{today}</lastmod>
+    </sitemap>
+''' for name in names)
+    with open(os.path.join(site_dir, SITEMAP_INDEX), 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{entries}</sitemapindex>')
+    print(f'Generated {SITEMAP_INDEX} ({len(names)} sitemaps)')
+
+
+def link_files(site_dir):
+    """Return the paths of the shard link graph files, one (source, target) edge per line"""
+    build_dir = os.path.join(site_dir, BUILD_DIR)
+    if not os.path.isdir(build_dir):
+        return []
+    return sorted(os.path.join(build_dir, name) for name in os.listdir(build_dir)
+                  if name.startswith(LINKS_PREFIX) and name.endswith('.tsv'))
+
+
+def remove_landing_pages(site_dir='.'):
+    """Remove the pages, sitemaps and link graph files of an earlier build
+
+    Runs before every build, since the grids or the shard count may have
+    changed, and on builds without landing pages so none are left deployed.
+    """
+    for name in landing_dirs():
+        shutil.rmtree(os.path.join(site_dir, name), ignore_errors=True)
+    for name in os.listdir(site_dir):
+        if name == SITEMAP_INDEX or (name.startswith(SITEMAP_PREFIX) and name.endswith('.xml')):
+            os.remove(os.path.join(site_dir, name))
+    for path in link_files(site_dir):
+        os.remove(path)
+
+
+def build_landing_pages(site_dir='.', workers=1, rum_endpoint=None, rum_sample_rate=rum.DEFAULT_SAMPLE_RATE):
+    """Generate all landing pages using one process per shard"""
+    remove_landing_pages(site_dir)
+
+    if workers <= 1:
+        build_shard(site_dir, 0, 1, rum_endpoint, rum_sample_rate)
+    else:
+        rum_args = ['--rum-endpoint', rum_endpoint, '--rum-sample-rate', str(rum_sample_rate)] if rum_endpoint else []
+        procs = [
+            subprocess.Popen([sys.executable, str(Path(__file__).resolve()), site_dir,
+                              '--shard', f'{shard}/{workers}', *rum_args])
+            for shard in range(workers)
+        ]
+        failed = [proc.args for proc in procs if proc.wait() != 0]
+        if failed:
+            raise RuntimeError(f'{len(failed)} landing page shard(s) failed')
+
+    write_sitemap_index(site_dir)
+    return SITEMAP_INDEX
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Generate FitCalcs landing pages')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR),
+                        help='directory containing the HTML pages')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of shard processes to run')
+    parser.add_argument('--shard', metavar='I/N',
+                        help='build only shard I of N (used by worker processes)')
+    parser.add_argument('--rum-endpoint', metavar='URL',
+                        help='inject the Web Vitals beacon, reporting to URL')
+    parser.add_argument('--rum-sample-rate', type=float, default=rum.DEFAULT_SAMPLE_RATE,
+                        help='share of page views that send a beacon (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.shard:
+        shard, shard_count = (int(part) for part in args.shard.split('/'))
+        build_shard(args.site_dir, shard, shard_count, args.rum_endpoint, args.rum_sample_rate)
+    else:
+        build_landing_pages(args.site_dir, args.workers, args.rum_endpoint, args.rum_sample_rate)
+
+
+if __name__ == '__main__':
+    main()
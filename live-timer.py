@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Shared live-update scheduler for FitCalcs
+Pages that tick on a clock, like the due date countdown, schedule their
+updates through window.FitTimer instead of setInterval. The build injects
+the scheduler just before the first script that uses it, in the body,
+where the head rewrites leave it alone. Ticks wake on the wall-clock
+boundary of their interval and run in an animation frame, stop while the
+tab is hidden, and FitTimer.text() skips writes that would not change a
+node, so an open tab that is not being watched costs nothing.
+
+    python live-timer.py
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+from site_catalog import discover_pages
+
+SCRIPT_DIR = Path(__file__).parent
+
+SCHEDULER_MARKER = '<!-- Live Timer -->'
+SCHEDULER_GLOBAL = 'FitTimer'
+
+# FitTimer.every(ms, tick) calls tick(now, handle) at once and then on each
+# ms boundary of the clock until handle.stop(). One timeout covers every
+# task; it wakes at the earliest due time and hands off to
+# requestAnimationFrame, which batches the DOM writes with the next paint.
+SCHEDULER_JS = '''(function(){if(window.FitTimer)return;
+var tasks=[],timeout=0,frame=0,raf=window.requestAnimationFrame||function(f){return setTimeout(f,16)};
+function due(k,t){return t-t%k.ms+k.ms}
+function run(){frame=0;var t=Date.now();tasks.slice().forEach(function(k){if(t>=k.due&&tasks.indexOf(k)>=0){k.due=due(k,t);k.tick(t)}});wake()}
+function wake(){clearTimeout(timeout);timeout=0;if(frame||document.hidden||!tasks.length)return;
+var next=Infinity;tasks.forEach(function(k){next=Math.min(next,k.due)});
+timeout=setTimeout(function(){timeout=0;frame=raf(run)},Math.max(0,next-Date.now()))}
+document.addEventListener('visibilitychange',function(){if(document.hidden)return wake();
+tasks.forEach(function(k){k.due=0});clearTimeout(timeout);timeout=0;if(!frame&&tasks.length)frame=raf(run)});
+window.FitTimer={
+every:function(ms,tick){var t=Date.now(),k={ms:ms,due:0},handle={stop:function(){var i=tasks.indexOf(k);if(i>=0)tasks.splice(i,1);wake()}};
+k.tick=function(now){tick(now,handle)};k.due=due(k,t);tasks.push(k);k.tick(t);wake();return handle},
+text:function(el,value){value=String(value);if(el.textContent!==value)el.textContent=value}};})();'''
+
+
+def scheduler_html():
+    """Return the marked <script> block for the scheduler"""
+    return f'{SCHEDULER_MARKER}\n<script>{SCHEDULER_JS}</script>\n{SCHEDULER_MARKER}'
+
+
+def _find_block(content):
+    """(start, end) of the marked scheduler block, or None"""
+    start = content.find(SCHEDULER_MARKER)
+    if start == -1:
+        return None
+    end = content.find(SCHEDULER_MARKER, start + len(SCHEDULER_MARKER))
+    return (start, end + len(SCHEDULER_MARKER)) if end != -1 else None
+
+
+def remove_scheduler(content):
+    """Remove the marked scheduler block and the newline after it"""
+    block = _find_block(content)
+    if not block:
+        return content
+    start, end = block
+    if content.startswith('\n', end):
+        end += 1
+    return content[:start] + content[end:]
+
+
+def uses_scheduler(content):
+    """True when a page script calls FitTimer outside the scheduler block"""
+    return f'{SCHEDULER_GLOBAL}.' in remove_scheduler(content)
+
+
+def inject_scheduler(content):
+    """Insert the scheduler before the first script that calls FitTimer,
+    moving any existing block there, and remove it from pages that no longer
+    call it"""
+    content = remove_scheduler(content)
+    first_use = content.find(f'{SCHEDULER_GLOBAL}.')
+    if first_use == -1:
+        return content
+    script = content.rfind('<script', 0, first_use)
+    if script == -1:
+        return content
+    return content[:script] + scheduler_html() + '\n' + content[script:]
+
+
+def optimize_file(filepath):
+    """Rewrite one page in place; return True if it changed"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        original = f.read()
+    content = inject_scheduler(original)
+    if content == original:
+        return False
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Inject the live-update scheduler into FitCalcs pages')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR))
+    args = parser.parse_args()
+
+    pages = discover_pages(args.site_dir)
+    modified = 0
+    for filename in pages:
+        if optimize_file(os.path.join(args.site_dir, filename)):
+            print(f'Updated: {filename}')
+            modified += 1
+    print(f'\nTotal files modified: {modified}/{len(pages)}')
+
+
+if __name__ == '__main__':
+    main()
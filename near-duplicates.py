@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate page detection for FitCalcs
+Builds word shingles from each page's visible text, sketches them with
+MinHash and buckets the sketches with LSH banding, so candidate pairs are
+found without comparing every page against every other. Pages whose
+estimated similarity passes the threshold are grouped into clusters, and
+each cluster gets one canonical URL that the meta, sitemap and link graph
+stages use.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+from pathlib import Path
+
+import site_catalog
+from rewrite_guard import MemoSearch, guarded, iter_blocks, literal, replace_spans
+from site_catalog import load_script, page_links
+
+SCRIPT_DIR = Path(__file__).parent
+BUILD_DIR = '.build'
+CLUSTERS_FILE = 'duplicates.json'
+LINK_GRAPH_FILE = 'link-graph.tsv'
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.6
+
+# Pages that serve the same search intent but were written independently,
+# so their text overlaps too little (4-18% of shingles) to be detected.
+KNOWN_DUPLICATES = [
+    ('walking-calorie-calculator.html', 'walking-calories-calculator.html'),
+    ('pace-calculator.html', 'running-pace-calculator.html'),
+    ('percentage-calc.html', 'percentage-calculator.html'),
+    ('baby-due-date-calculator.html', 'pregnancy-due-date-calculator.html'),
+]
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+
+optimize = load_script('seo-optimize.py')
+optimizer = load_script('seo-optimizer.py')
+
+
+# Shared boilerplate left out of the page text: the generated FAQ card and
+# these elements
+_FAQ_CARD = r'<div class="card"[^>]*>\s*<h2>Frequently Asked Questions</h2>.*?</div>\s*</div>'
+_FAQ_HEADING = re.compile(r'\s*<h2>Frequently Asked Questions</h2>')
+_CARD_END = re.compile(r'</div>\s*</div>')
+_BOILERPLATE = ('script', 'style', 'footer', 'nav')
+_BOILERPLATE_BLOCKS = [
+    (literal(f'<{name}', ignore_case=True), literal(f'</{name}>', ignore_case=True)) for name in _BOILERPLATE
+]
+
+
+def _strip_head(content):
+    return re.sub(r'<head>.*?</head>', ' ', content, flags=re.DOTALL)
+
+
+def _strip_head_linear(content):
+    return replace_spans(content, list(iter_blocks(content, '<head>', '</head>', attrs=False)), ' ')
+
+
+def _strip_faq_card(content):
+    return re.sub(_FAQ_CARD, ' ', content, flags=re.DOTALL)
+
+
+def _strip_faq_card_linear(content):
+    return replace_spans(content, list(_faq_card_spans(content)), ' ')
+
+
+def _strip_boilerplate(content):
+    return re.sub(r'<(%s)[^>]*>.*?</\1>' % '|'.join(_BOILERPLATE), ' ', content, flags=re.DOTALL | re.IGNORECASE)
+
+
+def _faq_card_spans(content):
+    """Spans matched by _FAQ_CARD, found with forward scans only"""
+    cards = MemoSearch(content, literal('<div class="card"'))
+    tag_ends = MemoSearch(content, literal('>'))
+    card_ends = MemoSearch(content, _CARD_END)
+    heading_at, heading = None, None
+    pos = 0
+    while True:
+        card = cards.search(pos)
+        if card is None:
+            return
+        tag_end = tag_ends.search(card.end())
+        if tag_end is None:
+            return
+        # Cards opened before the same '>' share one heading
+        if tag_end.end() != heading_at:
+            heading_at = tag_end.end()
+            heading = _FAQ_HEADING.match(content, heading_at)
+        if heading is None:
+            pos = card.start() + 1
+            continue
+        end = card_ends.search(heading.end())
+        if end is None:
+            return
+        yield card.start(), end.end()
+        pos = end.end()
+
+
+def _boilerplate_spans(content):
+    """Spans matched by <(script|style|footer|nav)[^>]*>.*?</\\1>, found with forward scans only"""
+    opens = {name: MemoSearch(content, literal(f'<{name}', ignore_case=True)) for name in _BOILERPLATE}
+    closes = {name: MemoSearch(content, literal(f'</{name}>', ignore_case=True)) for name in _BOILERPLATE}
+    tag_ends = MemoSearch(content, literal('>'))
+    pos = 0
+    while opens:
+        found = [(match.start(), name) for name, search in opens.items() for match in [search.search(pos)] if match]
+        if not found:
+            return
+        start, name = min(found)
+        tag_end = tag_ends.search(start + len(name) + 1)
+        if tag_end is None:
+            return
+        close = closes[name].search(tag_end.end())
+        if close is None:
+            # No later element of this name can close either
+            del opens[name]
+            continue
+        yield start, close.end()
+        pos = close.end()
+
+
+def _strip_boilerplate_linear(content):
+    return replace_spans(content, list(_boilerplate_spans(content)), ' ')
+
+
+def _strip_tags(content):
+    return re.sub(r'<[^>]+>', ' ', content)
+
+
+def _strip_tags_linear(content):
+    spans = []
+    pos = 0
+    while True:
+        start = content.find('<', pos)
+        end = content.find('>', start + 1) if start != -1 else -1
+        if end == -1:
+            return replace_spans(content, spans, ' ')
+        if end == start + 1:
+            pos = end
+            continue
+        spans.append((start, end + 1))
+        pos = end + 1
+
+
+def page_text(content):
+    """Visible page text, without head, scripts, styles, shared footer or FAQ"""
+    # Each step is checked on the content it sees; an earlier strip can
+    # remove the closing tags a later pattern needs
+    content = guarded(_strip_head, _strip_head_linear, content, blocks=[('<head>', '</head>')])
+    # The generated FAQ is shared boilerplate on most pages
+    content = guarded(_strip_faq_card, _strip_faq_card_linear, content, blocks=[('<div class="card"', _CARD_END)])
+    content = guarded(_strip_boilerplate, _strip_boilerplate_linear, content, blocks=_BOILERPLATE_BLOCKS)
+    content = guarded(_strip_tags, _strip_tags_linear, content, blocks=[('<', '>')])
+    return re.sub(r'&\w+;', ' ', content).lower()
+
+
+def shingles(text):
+    """Set of 64-bit hashes of overlapping word shingles"""
+    words = re.findall(r'[a-z0-9]+', text)
+    if len(words) < SHINGLE_WORDS:
+        words = words + [''] * (SHINGLE_WORDS - len(words))
+    return {
+        int.from_bytes(hashlib.blake2b(' '.join(words[i:i + SHINGLE_WORDS]).encode(), digest_size=8).digest(), 'big')
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def minhash(shingle_set):
+    """MinHash signature over NUM_PERM universal hash permutations"""
+    return tuple(min((a * h + b) % _MERSENNE for h in shingle_set) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures"""
+
+    def __init__(self):
+        self.buckets = [{} for _ in range(BANDS)]
+        self.signatures = {}
+
+    def add(self, key, signature):
+        """Index a signature and return the keys it collides with"""
+        candidates = set()
+        for band, buckets in enumerate(self.buckets):
+            bucket = buckets.setdefault(signature[band * ROWS:(band + 1) * ROWS], [])
+            candidates.update(bucket)
+            bucket.append(key)
+        self.signatures[key] = signature
+        return candidates
+
+
+def canonical_rank(page, inbound):
+    """Sort key for choosing a cluster's canonical page record (lowest wins)
+
+    Prefers pages in the footer categories, then pages with their own SEO
+    data, then the page with the most inbound links.
+    """
+    return (page.category is None, not page.has_seo_data, -inbound.get(page.filename, 0), page.filename)
+
+
+def find_clusters(catalog, threshold=THRESHOLD):
+    """Return near-duplicate clusters of the catalog's pages as {canonical: [duplicates]}"""
+    index = LSHIndex()
+    parent = {}
+    pages = catalog.filenames
+
+    def find(page):
+        while parent[page] != page:
+            parent[page] = parent[parent[page]]
+            page = parent[page]
+        return page
+
+    for page in pages:
+        signature = minhash(shingles(page_text(catalog.content(page))))
+        parent[page] = page
+        for other in index.add(page, signature):
+            if similarity(signature, index.signatures[other]) >= threshold:
+                parent[find(page)] = find(other)
+
+    for group in KNOWN_DUPLICATES:
+        present = [page for page in group if page in parent]
+        for page in present[1:]:
+            parent[find(page)] = find(present[0])
+
+    groups = {}
+    for page in pages:
+        groups.setdefault(find(page), []).append(page)
+
+    inbound = catalog.inbound_links()
+    clusters = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        canonical = min(members, key=lambda page: canonical_rank(catalog.by_filename[page], inbound))
+        clusters[canonical] = sorted(m for m in members if m != canonical)
+    return dict(sorted(clusters.items()))
+
+
+def canonical_map(clusters):
+    """Map every duplicate page to its canonical page"""
+    return {dup: canonical for canonical, dups in clusters.items() for dup in dups}
+
+
+def write_clusters(site_dir, clusters):
+    os.makedirs(os.path.join(site_dir, BUILD_DIR), exist_ok=True)
+    with open(os.path.join(site_dir, BUILD_DIR, CLUSTERS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(clusters, f, indent=1)
+
+
+class LinkGraphWriter:
+    """Streams internal links (source, target) with both ends resolved to canonicals"""
+
+    def __init__(self, site_dir, canonicals):
+        os.makedirs(os.path.join(site_dir, BUILD_DIR), exist_ok=True)
+        self.canonicals = canonicals
+        self.handle = open(os.path.join(site_dir, BUILD_DIR, LINK_GRAPH_FILE), 'w', encoding='utf-8')
+
+    def add(self, page, content):
+        for target in page_links(content):
+            self._write(page, target)
+
+    def add_edges(self, path):
+        """Merge a file of (source, target) lines, such as a landing page shard's"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                source, target = line.rstrip('\n').split('\t')
+                self._write(source, target)
+
+    def _write(self, source, target):
+        source = self.canonicals.get(source, source)
+        target = self.canonicals.get(target, target)
+        if target != source:
+            self.handle.write(f'{source}\t{target}\n')
+
+    def close(self):
+        self.handle.close()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Find near-duplicate FitCalcs pages')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR))
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='minimum estimated Jaccard similarity (default: %(default)s)')
+    args = parser.parse_args()
+
+    catalog = site_catalog.load(args.site_dir, optimize.CATEGORIES, optimizer.CALCULATOR_SEO_DATA)
+    clusters = find_clusters(catalog, args.threshold)
+    write_clusters(args.site_dir, clusters)
+    for canonical, dups in clusters.items():
+        print(f"{canonical} <- {', '.join(dups)}")
+    print(f'{len(clusters)} clusters, {sum(map(len, clusters.values()))} duplicate pages')
+
+
+if __name__ == '__main__':
+    main()
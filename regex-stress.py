@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Pathological-input stress harness for the page rewrites
+Feeds every rewrite of optimize_page() and optimize_html(), and the page
+text scan near-duplicates.py runs on the raw pages, adversarial and
+oversized pages (unclosed cards, nested and unterminated footers, whitespace
+floods, multi-megabyte bodies) and fails when one runs past the time limit
+or allocates more than a small multiple of the page size. A parity pass
+checks that the regex and linear-time paths of each rewrite agree, on the
+site's pages and on small adversarial inputs.
+
+    python regex-stress.py
+    python regex-stress.py --size 8000000 --time-limit 5
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import rewrite_guard  # noqa: E402
+import site_catalog  # noqa: E402
+from site_catalog import load_script  # noqa: E402
+
+BASE_PAGE = 'bmi-calculator.html'
+DEFAULT_SIZE = 2_000_000
+PARITY_SIZE = 4_000
+TIME_LIMIT = 2.0
+# Peak allocation allowed per rewrite, as a multiple of the page size
+MEMORY_FACTOR = 8
+
+optimize = load_script('seo-optimize.py')
+optimizer = load_script('seo-optimizer.py')
+render_hints = load_script('render-hints.py')
+live_timer = load_script('live-timer.py')
+duplicates = load_script('near-duplicates.py')
+
+
+@lru_cache(maxsize=None)
+def site_footer():
+    """The SEO footer the build would add, from the catalog of the site's pages"""
+    catalog = site_catalog.load(SCRIPT_DIR, optimize.CATEGORIES, optimizer.CALCULATOR_SEO_DATA, write_cache=False)
+    return optimize.build_footer(catalog)
+
+
+def rewrites():
+    """(name, function of content) for every rewrite the build applies"""
+    seo_data = optimizer.get_seo_data(BASE_PAGE)
+    return [
+        ('head', lambda content: optimizer.rewrite_head(BASE_PAGE, content, seo_data)),
+        ('faq', lambda content: optimizer.rewrite_faq(content, seo_data)),
+        ('h1', optimizer.demote_extra_h1),
+        ('keywords', optimize.remove_meta_keywords),
+        ('breadcrumb', optimize.fix_breadcrumb_divs),
+        ('main', optimize.close_main),
+        ('footer', lambda content: optimize.add_seo_footer(content, site_footer())),
+        ('footer-order', optimize.order_main_before_footer),
+        ('render', render_hints.optimize_content),
+        ('timer', live_timer.inject_scheduler),
+        ('text', duplicates.page_text),
+    ]
+
+
+def base_page():
+    """BASE_PAGE as it was before the build, with a plain footer instead of the SEO footer"""
+    page = (SCRIPT_DIR / BASE_PAGE).read_text(encoding='utf-8')
+    span = optimize.seo_footer_span(page)
+    return page[:span[0]] + '<footer><p>&copy; FitCalcs</p></footer>' + page[span[1]:] if span else page
+
+
+def repeat(unit, size):
+    return unit * max(1, size // len(unit))
+
+
+def in_body(page, payload):
+    """Base page with payload inserted before </body>"""
+    return page.replace('</body>', payload + '\n</body>', 1)
+
+
+# Each generator returns a page of roughly size characters
+GENERATORS = {
+    'unclosed-faq-cards': lambda page, size: in_body(
+        page, repeat('<div class="card"><h2>FAQ</h2><p>Answer</p></div>\n', size)),
+    'unclosed-cards': lambda page, size: in_body(page, repeat('<div class="card">\n', size)),
+    'unterminated-cards': lambda page, size: in_body(page, repeat('<div class="card" ', size)),
+    'nested-footers': lambda page, size: in_body(
+        page, repeat('<footer>', size // 2) + repeat('</footer>', size // 2)),
+    'unclosed-footers': lambda page, size: in_body(page, repeat('<footer><p>x</p>\n', size)),
+    'unterminated-footers': lambda page, size: in_body(page, repeat('<footer ', size)),
+    'unclosed-h1': lambda page, size: in_body(page, repeat('<h1>Title\n', size)),
+    'unterminated-h1': lambda page, size: in_body(page, repeat('<h1 ', size)),
+    'unterminated-keywords': lambda page, size: page.replace(
+        '</head>', repeat('<meta name="keywords" ', size) + '</head>', 1),
+    'unclosed-style': lambda page, size: repeat('<style>', size) + page,
+    'unclosed-head': lambda page, size: repeat('<head>', size) + page,
+    'whitespace-flood': lambda page, size: in_body(page, ' ' * size + 'x'),
+    'newline-flood': lambda page, size: page.replace('</nav>', '</nav>' + '\n' * size, 1),
+    'deep-divs': lambda page, size: in_body(page, repeat('<div>', size // 2) + repeat('</div>', size // 2)),
+    'multi-mb-body': lambda page, size: in_body(page, repeat(page[page.find('<body'):page.find('</body>')], size)),
+}
+
+
+def measure(rewrite, content):
+    """Return (seconds, peak bytes allocated) for one rewrite"""
+    start = time.perf_counter()
+    rewrite(content)
+    elapsed = time.perf_counter() - start
+    # Timed separately; tracemalloc slows the Python-level scans
+    tracemalloc.start()
+    try:
+        rewrite(content)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_stress(size, time_limit=TIME_LIMIT, memory_factor=MEMORY_FACTOR):
+    """Run every rewrite on every generator; return the number of failures"""
+    page = base_page()
+    failures = 0
+    for generator_name, generate in GENERATORS.items():
+        content = generate(page, size)
+        memory_limit = memory_factor * sys.getsizeof(content)
+        for name, rewrite in rewrites():
+            elapsed, peak = measure(rewrite, content)
+            ok = elapsed <= time_limit and peak <= memory_limit
+            failures += not ok
+            print(f"{generator_name:<24} {name:<13} {elapsed * 1000:9.1f} ms {peak / 1e6:8.1f} MB"
+                  f"  {'OK' if ok else 'FAIL'}")
+    return failures
+
+
+def run_parity(size=PARITY_SIZE):
+    """Compare the regex and linear-time path of every rewrite; return the number of mismatches"""
+    pages = {path.name: path.read_text(encoding='utf-8') for path in sorted(SCRIPT_DIR.glob('*.html'))}
+    inputs = dict(pages)
+    for generator_name, generate in GENERATORS.items():
+        inputs[generator_name] = generate(base_page(), size)
+
+    mismatches = 0
+    for input_name, content in inputs.items():
+        for name, rewrite in rewrites():
+            with rewrite_guard.forced('regex'):
+                expected = rewrite(content)
+            with rewrite_guard.forced('linear'):
+                actual = rewrite(content)
+            if actual != expected:
+                print(f'  {input_name} {name}: linear path differs from regex')
+                mismatches += 1
+    print(f'Parity: {len(inputs)} inputs x {len(rewrites())} rewrites, {mismatches} mismatches')
+    return mismatches
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Stress the page rewrites with pathological input')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='characters per generated page')
+    parser.add_argument('--time-limit', type=float, default=TIME_LIMIT, help='seconds allowed per rewrite')
+    parser.add_argument('--memory-factor', type=float, default=MEMORY_FACTOR,
+                        help='peak allocation allowed per rewrite, as a multiple of the page size')
+    args = parser.parse_args()
+
+    failures = run_parity() + run_stress(args.size, args.time_limit, args.memory_factor)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
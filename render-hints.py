@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Below-the-fold rendering hints for FitCalcs
+Marks the FAQ, related tools and article sections and the footer with
+content-visibility:auto and an estimated contain-intrinsic-size, so the
+browser skips their layout and paint until they scroll near the viewport.
+Images and iframes below the page heading get loading="lazy" and
+decoding="async", and every ad slot reserves the height of its ad so the
+ad filling in does not shift the page.
+"""
+
+import argparse
+import bisect
+import os
+import re
+from pathlib import Path
+
+from rewrite_guard import iter_blocks
+from site_catalog import HOME_PAGE, discover_pages
+
+SCRIPT_DIR = Path(__file__).parent
+
+DEFERRED_ATTR = 'data-render="deferred"'
+AD_SLOT_ATTR = 'data-ad-slot'
+
+# Ad containers on the calculator pages and index.html
+AD_SLOT_CLASSES = ('ad-top', 'ad-mobile', 'ad-inline', 'ad-bottom', 'ad-banner', 'sidebar-ad')
+
+# (width, height) of each ad unit, for slots that load invoke.js without
+# an inline config
+AD_SIZES = {
+    'b43e7cf5057864a264961884e1f34530': (728, 90),
+    '9f6b66d433cad4c02b643bdd4b7eefc0': (320, 50),
+    'ee368c7cdf94f06bc71fdf57fe4124b8': (300, 250),
+    'bca56f01884f1cf07c196213009e77ac': (468, 60),
+    'd4702b3e9743f9cd914a00e5026493f3': (160, 600),
+    '8398a480b05e8a3236f9ea561b7cab1a': (160, 300),
+}
+
+# Card headings whose card is below the calculator
+DEFERRED_HEADINGS = re.compile(r'FAQ|Frequently Asked|Related Tools', re.IGNORECASE)
+DEFERRED_SECTIONS = ('info-section', 'related-tools')
+
+# Rough desktop metrics for contain-intrinsic-size; 'auto' makes the
+# browser keep the real size once a section has rendered
+SECTION_PADDING = 80
+ROW_HEIGHT = 48
+LINKS_PER_ROW = 3
+LINE_HEIGHT = 26
+CHARS_PER_LINE = 90
+
+# Tag patterns stop at the next '<', so unterminated tags cost one scan each
+_CARD_HEADING = re.compile(r'\s*<h2>([^<]*)</h2>', re.IGNORECASE)
+_DEFERRED_TAG = re.compile(r'<(div) class="card"[^<>]*>|<(section) class="(?:%s)"[^<>]*>|<(footer)\b[^<>]*>'
+                           % '|'.join(DEFERRED_SECTIONS), re.IGNORECASE)
+_AD_SLOT = re.compile(r'<div class="(?:%s)"[^<>]*>' % '|'.join(AD_SLOT_CLASSES))
+_MEDIA = re.compile(r'<(?:img|iframe)\b[^<>]*>', re.IGNORECASE)
+_BOUNDARY = re.compile(r'<(/?)(div|section|footer)\b[^<>]*>?', re.IGNORECASE)
+_AD_KEY = re.compile(r"'key'\s*:\s*'(\w+)'|/(\w+)/invoke\.js|container-(\w+)")
+_AD_CONFIG = re.compile(r"'height'\s*:\s*(\d+),\s*'width'\s*:\s*(\d+)")
+
+
+def element_ends(content):
+    """Map the start of each div, section and footer to the index just past its closing tag
+
+    Unclosed elements are left out.
+    """
+    ends = {}
+    open_tags = {}
+    for match in _BOUNDARY.finditer(content):
+        closing, name = match.group(1), match.group(2).lower()
+        stack = open_tags.setdefault(name, [])
+        if not closing:
+            stack.append(match.start())
+        elif stack:
+            ends[stack.pop()] = match.end()
+    return ends
+
+
+def estimate_height(block):
+    """Rough rendered height in pixels of a section"""
+    # Links and list items sit in grids and columns; a link inside an item counts once
+    items = max(len(re.findall(r'<a\b', block)), len(re.findall(r'<li\b', block)))
+    rows = len(re.findall(r'<(?:details|h3|h4)\b', block)) + -(-items // LINKS_PER_ROW)
+    text = ' '.join(re.sub(r'<[^<>]*>?', ' ', block).split())
+    height = SECTION_PADDING + rows * ROW_HEIGHT + len(text) // CHARS_PER_LINE * LINE_HEIGHT
+    return -(-height // 20) * 20
+
+
+def add_to_tag(tag, attributes, style=''):
+    """Return an opening tag with attributes and style declarations appended
+
+    Attributes go last so patterns keyed on the tag's leading class, like
+    the FAQ rewrite's, still match.
+    """
+    if style:
+        match = re.search(r'style="([^"]*)"', tag)
+        if match:
+            existing = match.group(1).strip()
+            if existing and not existing.endswith(';'):
+                existing += ';'
+            tag = f'{tag[:match.start()]}style="{(existing + " " + style).strip()}"{tag[match.end():]}'
+        else:
+            tag = f'{tag[:-1]} style="{style}">'
+    end = len(tag) - 2 if tag.endswith('/>') else len(tag) - 1
+    return f'{tag[:end].rstrip()} {attributes}{tag[end:]}'
+
+
+class ScriptSpans:
+    """Inline scripts, whose markup strings must not be touched"""
+
+    def __init__(self, content):
+        self.spans = list(iter_blocks(content, '<script', '</script>'))
+        self.starts = [start for start, _ in self.spans]
+
+    def __contains__(self, index):
+        i = bisect.bisect_right(self.starts, index) - 1
+        return i >= 0 and index < self.spans[i][1]
+
+
+def deferred_section_edits(content, ends, scripts):
+    """(start, end, new tag) edits marking below-the-fold sections
+
+    Unclosed sections are left alone, and sections nested in a marked
+    section are skipped; they are deferred with it.
+    """
+    result = []
+    covered = 0
+    for match in _DEFERRED_TAG.finditer(content):
+        opening = match.group(0)
+        end = ends.get(match.start())
+        if end is None or match.start() < covered or match.start() in scripts:
+            continue
+        if DEFERRED_ATTR in opening:
+            covered = end
+            continue
+        if match.group(1):
+            heading = _CARD_HEADING.match(content, match.end())
+            if not heading or not DEFERRED_HEADINGS.search(heading.group(1)):
+                continue
+        covered = end
+        height = estimate_height(content[match.start():end])
+        style = f'content-visibility: auto; contain-intrinsic-size: auto {height}px;'
+        result.append((match.start(), match.end(), add_to_tag(opening, DEFERRED_ATTR, style)))
+    return result
+
+
+def ad_slot_edits(content, ends, scripts):
+    """(start, end, new tag) edits reserving the height of each closed ad slot"""
+    result = []
+    covered = 0
+    for match in _AD_SLOT.finditer(content):
+        opening = match.group(0)
+        end = ends.get(match.start())
+        if end is None or match.start() < covered or match.start() in scripts:
+            continue
+        covered = end
+        if AD_SLOT_ATTR in opening:
+            continue
+        block = content[match.end():covered]
+        config = _AD_CONFIG.search(block)
+        key = _AD_KEY.search(block)
+        key = key and next(filter(None, key.groups()))
+        if config:
+            height, width = map(int, config.groups())
+        elif key in AD_SIZES:
+            width, height = AD_SIZES[key]
+        else:
+            continue
+        # content-box keeps the slot's padding outside the reserved height
+        style = f'box-sizing: content-box; min-height: {height}px;'
+        result.append((match.start(), match.end(), add_to_tag(opening, f'{AD_SLOT_ATTR}="{width}x{height}"', style)))
+    return result
+
+
+def media_edits(content, scripts):
+    """(start, end, new tag) edits making images and iframes below the heading lazy"""
+    heading = content.find('</h1>')
+    result = []
+    for match in _MEDIA.finditer(content, max(heading, 0)):
+        tag = match.group(0)
+        if match.start() in scripts or 'loading=' in tag or 'fetchpriority="high"' in tag:
+            continue
+        attributes = 'loading="lazy"' if 'decoding=' in tag else 'loading="lazy" decoding="async"'
+        result.append((match.start(), match.end(), add_to_tag(tag, attributes)))
+    return result
+
+
+def apply_edits(content, edits):
+    """Replace non-overlapping (start, end, text) spans"""
+    parts = []
+    pos = 0
+    for start, end, text in sorted(edits):
+        parts.append(content[pos:start])
+        parts.append(text)
+        pos = end
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def optimize_content(content):
+    """Add below-the-fold rendering hints and ad slot reservations to a page"""
+    ends = element_ends(content)
+    scripts = ScriptSpans(content)
+    edits = deferred_section_edits(content, ends, scripts) + ad_slot_edits(content, ends, scripts)
+    return apply_edits(content, edits + media_edits(content, scripts))
+
+
+def optimize_file(filepath):
+    """Rewrite one page in place; return True if it changed"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        original = f.read()
+    content = optimize_content(original)
+    if content == original:
+        return False
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Add below-the-fold rendering hints to FitCalcs pages')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR))
+    args = parser.parse_args()
+
+    pages = discover_pages(args.site_dir)
+    if os.path.exists(os.path.join(args.site_dir, HOME_PAGE)):
+        pages.append(HOME_PAGE)
+    modified = 0
+    for filename in pages:
+        if optimize_file(os.path.join(args.site_dir, filename)):
+            print(f'Optimized: {filename}')
+            modified += 1
+    print(f'\nTotal files modified: {modified}/{len(pages)}')
+
+
+if __name__ == '__main__':
+    main()
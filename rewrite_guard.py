@@ -0,0 +1,210 @@
+"""
+Guard for the regex page rewrites
+The build scripts rewrite pages with non-greedy regexes, which backtrack
+quadratically on malformed markup (unclosed blocks, runs of whitespace,
+tags missing their '>'). guarded() runs a rewrite's regex only when a
+linear-time preflight finds the page regular enough, and otherwise uses the
+rewrite's linear-time fallback, which produces the same result with plain
+forward scans. An interval timer interrupts the regex as a backstop.
+"""
+
+import re
+import signal
+import sys
+import threading
+from contextlib import contextmanager
+
+# Pages larger than this always take the linear path
+MAX_REGEX_CHARS = 1_000_000
+
+# Leading \s* retries every position of a whitespace run
+MAX_WHITESPACE_RUN = 4096
+
+# Seconds before a regex rewrite is interrupted; the regex engine only
+# checks for signals every few thousand steps, so this is a lower bound
+TIME_LIMIT = 0.5
+
+# Starts only at the beginning of a run, so each run is scanned once
+_LONG_WHITESPACE = re.compile(r'(?<!\s)\s{%d}' % (MAX_WHITESPACE_RUN + 1))
+_timer_active = False
+# (content, result) of the last page-level check
+_last_page = (None, False)
+_forced_path = None
+
+
+class RewriteTimeout(Exception):
+    """Raised inside a regex rewrite that ran past TIME_LIMIT"""
+
+
+class MemoSearch:
+    """Forward searches for one pattern that never rescan a region
+
+    Callers search from non-decreasing positions, so a previous result is
+    reused until the search position moves past it.
+    """
+
+    def __init__(self, content, pattern):
+        self.content = content
+        self.pattern = pattern
+        self.searched_from = None
+        self.match = None
+
+    def search(self, pos):
+        """First match starting at or after pos, or None"""
+        if (self.searched_from is not None and self.searched_from <= pos
+                and (self.match is None or pos <= self.match.start())):
+            return self.match
+        self.searched_from = pos
+        self.match = self.pattern.search(self.content, pos)
+        return self.match
+
+
+def literal(token, ignore_case=False):
+    """Compiled pattern matching token literally"""
+    return re.compile(re.escape(token), re.IGNORECASE if ignore_case else 0)
+
+
+def iter_blocks(content, open_token, close_token=None, attrs=True, ignore_case=False):
+    """Yield (start, end) of the matches of open[^>]*>.*?close, in linear time
+
+    Matches the same non-overlapping spans as re.finditer with DOTALL. With
+    attrs=False the open token is matched exactly (open.*?close), and with
+    close_token=None a block ends at the '>' of its open tag.
+    """
+    opens = MemoSearch(content, literal(open_token, ignore_case))
+    closes = MemoSearch(content, literal(close_token, ignore_case)) if close_token else None
+    tag_ends = MemoSearch(content, literal('>'))
+    pos = 0
+    while True:
+        match = opens.search(pos)
+        if match is None:
+            return
+        start, end = match.span()
+        if attrs:
+            tag_end = tag_ends.search(end)
+            # Later opens cannot find a '>' or close further on either
+            if tag_end is None:
+                return
+            end = tag_end.end()
+        if closes:
+            close = closes.search(end)
+            if close is None:
+                return
+            end = close.end()
+        yield start, end
+        pos = end
+
+
+def whitespace_before(content, index, floor=0):
+    """Start of the whitespace run ending at index, not reaching below floor"""
+    while index > floor and content[index - 1].isspace():
+        index -= 1
+    return index
+
+
+def whitespace_after(content, index):
+    """End of the whitespace run starting at index"""
+    while index < len(content) and content[index].isspace():
+        index += 1
+    return index
+
+
+def replace_spans(content, spans, replacement):
+    """Replace sorted, non-overlapping spans; replacement is a string or a function of the span text"""
+    parts = []
+    pos = 0
+    for start, end in spans:
+        parts.append(content[pos:start])
+        parts.append(replacement(content[start:end]) if callable(replacement) else replacement)
+        pos = end
+    if not parts:
+        return content
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def page_regular(content):
+    """True when content is small enough and free of long whitespace runs
+
+    Rewrites of one page call this with the same string, so the result for
+    the last page checked is reused.
+    """
+    global _last_page
+    checked, regular = _last_page
+    if content is not checked:
+        regular = len(content) <= MAX_REGEX_CHARS and not _LONG_WHITESPACE.search(content)
+        _last_page = (content, regular)
+    return regular
+
+
+def _block_pattern(token):
+    return literal(token, ignore_case=True) if isinstance(token, str) else token
+
+
+def regex_safe(content, blocks=()):
+    """True when the backtracking regexes run in linear time on content
+
+    blocks lists the (open, close) tokens a rewrite's regex matches, as
+    strings or compiled patterns. Each open needs a '>' before the next open
+    and a later close; otherwise every failed start rescans the rest of the
+    page.
+    """
+    if not page_regular(content):
+        return False
+    for open_token, close_token in blocks:
+        opens = [m.start() for m in _block_pattern(open_token).finditer(content)]
+        if not opens:
+            continue
+        for previous, current in zip(opens, opens[1:]):
+            if content.find('>', previous, current) == -1:
+                return False
+        if not _block_pattern(close_token or '>').search(content, opens[-1]):
+            return False
+    return True
+
+
+def _interrupt(signum, frame):
+    raise RewriteTimeout()
+
+
+def _run_with_timer(rewrite, content):
+    global _timer_active
+    if (_timer_active or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        return rewrite(content)
+    previous = signal.signal(signal.SIGALRM, _interrupt)
+    _timer_active = True
+    signal.setitimer(signal.ITIMER_REAL, TIME_LIMIT)
+    try:
+        return rewrite(content)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        _timer_active = False
+
+
+@contextmanager
+def forced(path):
+    """Run every guarded rewrite on one path ('regex' or 'linear'), for comparing them"""
+    global _forced_path
+    if path not in ('regex', 'linear'):
+        raise ValueError(f"path must be 'regex' or 'linear', not {path!r}")
+    previous, _forced_path = _forced_path, path
+    try:
+        yield
+    finally:
+        _forced_path = previous
+
+
+def guarded(rewrite, fallback, content, blocks=()):
+    """Return rewrite(content), or fallback(content) for pages the regex would stall on"""
+    if _forced_path:
+        return rewrite(content) if _forced_path == 'regex' else fallback(content)
+    if not regex_safe(content, blocks):
+        return fallback(content)
+    try:
+        return _run_with_timer(rewrite, content)
+    except RewriteTimeout:
+        name = getattr(rewrite, '__name__', 'rewrite')
+        print(f'Warning: {name} ran past {TIME_LIMIT}s, using the linear-time path', file=sys.stderr)
+        return fallback(content)
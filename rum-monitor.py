@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Real User Monitoring for FitCalcs
+Provides the Web Vitals beacon injected by the build, a local collector that
+appends beacons to a JSON lines log, and a report of p50/p75/p95 per page.
+
+    python rum-monitor.py serve --port 8099
+    python rum-monitor.py report
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from site_catalog import HOME_PAGE, discover_pages
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_LOG = SCRIPT_DIR / '.build' / 'rum.jsonl'
+DEFAULT_SAMPLE_RATE = 0.1
+
+METRICS = ('lcp', 'cls', 'inp', 'ttfb')
+# Largest plausible value per metric (milliseconds, or the unitless CLS
+# score); anything above is a broken or forged beacon
+METRIC_LIMITS = {'lcp': 600_000, 'cls': 100, 'inp': 600_000, 'ttfb': 600_000}
+PERCENTILES = (50, 75, 95)
+
+# Beacons larger than this are dropped unread
+MAX_BEACON_BYTES = 2048
+
+BEACON_MARKER = '<!-- RUM Beacon -->'
+
+# Shard sitemaps written by landing-pages.py
+LANDING_SITEMAP_PREFIX = 'sitemap-landing-'
+
+# Reports LCP, CLS, INP and TTFB once per sampled page view when the page is
+# hidden. CLS is the plain sum of shifts without input, and INP is the
+# longest interaction, which is close enough for per-page percentiles.
+BEACON_JS = '''(function(){if(Math.random()>=%(rate)s||!window.PerformanceObserver||!navigator.sendBeacon)return;
+var m={page:location.pathname.replace(/^\\//,'')||'index.html',cls:0},sent=0;
+function o(t,f,x){try{var p=new PerformanceObserver(function(l){l.getEntries().forEach(f)});p.observe(Object.assign({type:t,buffered:true},x))}catch(e){}}
+o('largest-contentful-paint',function(e){m.lcp=e.startTime});
+o('layout-shift',function(e){if(!e.hadRecentInput)m.cls+=e.value});
+o('event',function(e){if(e.interactionId)m.inp=Math.max(m.inp||0,e.duration)},{durationThreshold:40});
+var n=performance.getEntriesByType('navigation')[0];if(n)m.ttfb=n.responseStart;
+function send(){if(sent)return;sent=1;navigator.sendBeacon(%(endpoint)s,JSON.stringify(m))}
+addEventListener('visibilitychange',function(){if(document.visibilityState==='hidden')send()});addEventListener('pagehide',send)})();'''
+
+
+def beacon_html(endpoint, sample_rate=DEFAULT_SAMPLE_RATE):
+    """Return the marked <script> block for the beacon"""
+    js = BEACON_JS % {'rate': float(sample_rate), 'endpoint': json.dumps(endpoint)}
+    return f'{BEACON_MARKER}\n<script>{js}</script>\n{BEACON_MARKER}'
+
+
+def inject_beacon(content, endpoint, sample_rate=DEFAULT_SAMPLE_RATE):
+    """Insert the beacon before </head>, replacing any existing beacon"""
+    block = beacon_html(endpoint, sample_rate)
+    marker = re.escape(BEACON_MARKER)
+    existing = re.compile(rf'{marker}.*?{marker}', re.DOTALL)
+    if existing.search(content):
+        return existing.sub(lambda m: block, content, count=1)
+    return content.replace('</head>', block + '\n</head>', 1)
+
+
+def remove_beacon(content):
+    """Remove the beacon inserted by inject_beacon(), if any"""
+    marker = re.escape(BEACON_MARKER)
+    return re.sub(rf'{marker}.*?{marker}\n?', '', content, count=1, flags=re.DOTALL)
+
+
+# --- Collector -------------------------------------------------------------
+
+def valid_value(metric, value):
+    """True for a finite number within the metric's plausible range"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and 0 <= value <= METRIC_LIMITS[metric])
+
+
+def parse_beacon(body):
+    """Validate a beacon payload and return the record to log, or None"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get('page'), str):
+        return None
+    record = {'page': data['page'][:200]}
+    for metric in METRICS:
+        value = data.get(metric)
+        if valid_value(metric, value):
+            record[metric] = value
+    return record if len(record) > 1 else None
+
+
+class BeaconLog:
+    """Append-only JSON lines log shared by the request threads"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def append(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def make_handler(log):
+    """Build a request handler class bound to a BeaconLog"""
+
+    class BeaconHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                self._reply(400)
+                return
+            if length <= 0 or length > MAX_BEACON_BYTES:
+                self._reply(413 if length > MAX_BEACON_BYTES else 400)
+                return
+            record = parse_beacon(self.rfile.read(length))
+            if record is None:
+                self._reply(400)
+                return
+            record['ts'] = int(time.time())
+            log.append(record)
+            self._reply(204)
+
+        def do_OPTIONS(self):
+            self._reply(204)
+
+        def _reply(self, status):
+            self.send_response(status)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return BeaconHandler
+
+
+def make_server(host='127.0.0.1', port=8099, log_path=DEFAULT_LOG):
+    """Create the collector server without starting it"""
+    return ThreadingHTTPServer((host, port), make_handler(BeaconLog(log_path)))
+
+
+# --- Aggregator ------------------------------------------------------------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def report_pages(site_dir):
+    """Return the paths of every page the site serves
+
+    Calculator pages come from the site directory, not sitemap.xml, which
+    leaves out near-duplicate pages that are still served. Landing pages
+    come from their shard sitemaps.
+    """
+    pages = {HOME_PAGE, *discover_pages(site_dir)}
+    for name in sorted(os.listdir(site_dir)):
+        if name.startswith(LANDING_SITEMAP_PREFIX) and name.endswith('.xml'):
+            with open(os.path.join(site_dir, name), 'r', encoding='utf-8') as f:
+                for loc in re.findall(r'<loc>https://fitcalcs\.xyz/([^<]*)</loc>', f.read()):
+                    if loc.endswith('.html'):
+                        pages.add(loc)
+    return pages
+
+
+def aggregate(log_path, pages):
+    """Return {page: {metric: (count, p50, p75, p95)}} for the given pages"""
+    samples = {}
+    if not os.path.exists(log_path):
+        return {}
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            page = record.get('page') if isinstance(record, dict) else None
+            if page not in pages:
+                continue
+            page_samples = samples.setdefault(page, {})
+            for metric in METRICS:
+                # Logs written before values were range-checked may hold Infinity
+                if valid_value(metric, record.get(metric)):
+                    page_samples.setdefault(metric, []).append(record[metric])
+
+    report = {}
+    for page, metrics in sorted(samples.items()):
+        report[page] = {}
+        for metric, values in metrics.items():
+            values.sort()
+            report[page][metric] = (len(values), *(percentile(values, pct) for pct in PERCENTILES))
+    return report
+
+
+def print_report(report):
+    print(f"{'page':<45} {'metric':<6} {'n':>6} {'p50':>9} {'p75':>9} {'p95':>9}")
+    for page, metrics in report.items():
+        for metric in METRICS:
+            if metric not in metrics:
+                continue
+            count, *values = metrics[metric]
+            fmt = '{:>9.3f}' if metric == 'cls' else '{:>9.0f}'
+            print(f'{page:<45} {metric:<6} {count:>6} ' + ' '.join(fmt.format(v) for v in values))
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='FitCalcs Real User Monitoring collector')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help='accept beacons into the log')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8099)
+    serve.add_argument('--log', default=str(DEFAULT_LOG))
+
+    report = sub.add_parser('report', help='print p50/p75/p95 per page')
+    report.add_argument('--log', default=str(DEFAULT_LOG))
+    report.add_argument('--site-dir', default=str(SCRIPT_DIR))
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        server = make_server(args.host, args.port, args.log)
+        print(f'Collecting beacons on http://{args.host}:{args.port}/ into {args.log}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        print_report(aggregate(args.log, report_pages(args.site_dir)))
+
+
+if __name__ == '__main__':
+    main()
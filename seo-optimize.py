@@ -8,6 +8,10 @@ import os
 import re
 from pathlib import Path
 
+from rewrite_guard import guarded, iter_blocks, replace_spans, whitespace_after, whitespace_before
+import site_catalog
+from site_catalog import load_script
+
 # Categories for internal linking
 CATEGORIES = {
     'Health & Body': [
@@ -46,55 +50,20 @@ CATEGORIES = {
     ],
 }
 
-# SEO-optimized footer HTML
-FOOTER_HTML = '''
+# SEO-optimized footer HTML, filled in by build_footer()
+FOOTER_MARKER = '<!-- SEO Footer -->'
+FOOTER_TEMPLATE = '''
     <!-- SEO Footer -->
     <footer style="background: #0c1322; border-top: 1px solid rgba(255,255,255,0.1); padding: 40px 20px; margin-top: 40px;">
         <div style="max-width: 1200px; margin: 0 auto;">
-            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 30px; margin-bottom: 30px;">
-                <div>
-                    <h3 style="color: #ea580c; font-size: 1rem; margin-bottom: 15px;">Health & Body</h3>
-                    <ul style="list-style: none; padding: 0; margin: 0;">
-                        <li style="margin-bottom: 8px;"><a href="bmi-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">BMI Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="body-fat-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Body Fat Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="ideal-weight-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Ideal Weight Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="blood-pressure-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Blood Pressure</a></li>
-                    </ul>
-                </div>
-                <div>
-                    <h3 style="color: #ea580c; font-size: 1rem; margin-bottom: 15px;">Nutrition & Diet</h3>
-                    <ul style="list-style: none; padding: 0; margin: 0;">
-                        <li style="margin-bottom: 8px;"><a href="calorie-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Calorie Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="tdee-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">TDEE Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="macro-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Macro Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="keto-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Keto Calculator</a></li>
-                    </ul>
-                </div>
-                <div>
-                    <h3 style="color: #ea580c; font-size: 1rem; margin-bottom: 15px;">Fitness</h3>
-                    <ul style="list-style: none; padding: 0; margin: 0;">
-                        <li style="margin-bottom: 8px;"><a href="one-rep-max-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">One Rep Max</a></li>
-                        <li style="margin-bottom: 8px;"><a href="workout-calorie-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Workout Calories</a></li>
-                        <li style="margin-bottom: 8px;"><a href="running-pace-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Running Pace</a></li>
-                        <li style="margin-bottom: 8px;"><a href="weight-loss-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Weight Loss</a></li>
-                    </ul>
-                </div>
-                <div>
-                    <h3 style="color: #ea580c; font-size: 1rem; margin-bottom: 15px;">Pregnancy</h3>
-                    <ul style="list-style: none; padding: 0; margin: 0;">
-                        <li style="margin-bottom: 8px;"><a href="pregnancy-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Pregnancy Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="due-date-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Due Date Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="ovulation-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Ovulation Calculator</a></li>
-                        <li style="margin-bottom: 8px;"><a href="baby-weight-calculator.html" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">Baby Weight</a></li>
-                    </ul>
-                </div>
+            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 30px; margin-bottom: 30px;">{columns}
             </div>
             <div style="text-align: center; padding-top: 20px; border-top: 1px solid rgba(255,255,255,0.1);">
                 <p style="color: #64748b; font-size: 0.85rem; margin-bottom: 10px;">
                     <a href="/" style="color: #ea580c; text-decoration: none; font-weight: 600;">FitCalcs</a> - Free Health & Fitness Calculators
                 </p>
                 <p style="color: #475569; font-size: 0.75rem;">
-                    62 free calculators for BMI, calories, macros, pregnancy, and more. No signup required.
+                    {count} free calculators for BMI, calories, macros, pregnancy, and more. No signup required.
                 </p>
                 <p style="color: #475569; font-size: 0.75rem; margin-top: 10px;">
                     &copy; 2025 FitCalcs. All rights reserved. |
@@ -104,8 +73,131 @@ FOOTER_HTML = '''
         </div>
     </footer>
 '''
+FOOTER_COLUMN = '''
+                <div>
+                    <h3 style="color: #ea580c; font-size: 1rem; margin-bottom: 15px;">{category}</h3>
+                    <ul style="list-style: none; padding: 0; margin: 0;">{links}
+                    </ul>
+                </div>'''
+FOOTER_LINK = '''
+                        <li style="margin-bottom: 8px;"><a href="{filename}" style="color: #94a3b8; text-decoration: none; font-size: 0.9rem;">{label}</a></li>'''
+
+
+def build_footer(catalog):
+    """Render the SEO footer from the site catalog: a column per category
+    linking the catalog's pages in CATEGORIES order, and the page count."""
+    columns = []
+    for category, links in CATEGORIES.items():
+        pages = [catalog.by_filename[filename] for filename, _label in links if filename in catalog]
+        if pages:
+            columns.append(FOOTER_COLUMN.format(category=category, links=''.join(
+                FOOTER_LINK.format(filename=page.filename, label=page.name) for page in pages)))
+    return FOOTER_TEMPLATE.format(columns=''.join(columns), count=len(catalog))
+
 
-def optimize_html(filepath):
+def seo_footer_span(content):
+    """(start, end) of the SEO footer from its marker through </footer>, or None"""
+    start = content.find(FOOTER_MARKER)
+    if start == -1:
+        return None
+    end = content.find('</footer>', start)
+    return (start, end + len('</footer>')) if end != -1 else None
+
+
+def _footer_body(content):
+    """(start, end) of the SEO footer's contents, between its <footer> tag and </footer>"""
+    span = seo_footer_span(content)
+    if not span:
+        return None
+    tag = content.find('<footer', *span)
+    close = content.find('>', tag, span[1]) if tag != -1 else -1
+    return (close + 1, span[1] - len('</footer>')) if close != -1 else None
+
+
+def _strip_meta_keywords(content):
+    return re.sub(r'\s*<meta name="keywords"[^>]*>\n?', '', content)
+
+
+def _strip_meta_keywords_linear(content):
+    spans = []
+    floor = 0
+    for start, end in iter_blocks(content, '<meta name="keywords"'):
+        if content.startswith('\n', end):
+            end += 1
+        spans.append((whitespace_before(content, start, floor), end))
+        floor = end
+    return replace_spans(content, spans, '')
+
+
+def remove_meta_keywords(content):
+    """Remove meta keywords tag (Google ignores it)."""
+    return guarded(_strip_meta_keywords, _strip_meta_keywords_linear, content,
+                   blocks=[('<meta name="keywords"', None)])
+
+
+def fix_breadcrumb_divs(content):
+    """Fix stray closing divs after breadcrumb nav."""
+    return re.sub(r'(</nav>)\s*</div>\s*</div>\s*\n', r'\1\n', content)
+
+
+def close_main(content):
+    """Add closing </main> tag if missing before </body>."""
+    if '<main>' in content or '<main ' in content:
+        if '</main>' not in content:
+            content = content.replace('</body>', '</main>\n</body>')
+    return content
+
+
+def _strip_footers(content):
+    return re.sub(r'\s*<footer[^>]*>.*?</footer>\s*', '', content, flags=re.DOTALL)
+
+
+def _strip_footers_linear(content):
+    spans = []
+    floor = 0
+    for start, end in iter_blocks(content, '<footer', '</footer>'):
+        end = whitespace_after(content, end)
+        spans.append((whitespace_before(content, start, floor), end))
+        floor = end
+    return replace_spans(content, spans, '')
+
+
+def add_seo_footer(content, footer):
+    """Add the SEO footer (from build_footer) before </body>, or update the links in an existing one."""
+    if FOOTER_MARKER in content:
+        # Keep the existing <footer> tag, which the rendering hints add to
+        body = _footer_body(content)
+        if body:
+            start, end = _footer_body(footer)
+            content = content[:body[0]] + footer[start:end] + content[body[1]:]
+        return content
+    # Remove any existing simple footer
+    content = guarded(_strip_footers, _strip_footers_linear, content, blocks=[('<footer', '</footer>')])
+    # Add new SEO footer
+    return content.replace('</body>', footer + '\n</body>')
+
+
+def order_main_before_footer(content):
+    """Ensure proper HTML structure.
+
+    Close any unclosed main tags before footer.
+    """
+    if '</main>' in content and FOOTER_MARKER in content:
+        # Make sure </main> comes before footer
+        content = re.sub(r'(</main>)\s*(<!-- SEO Footer -->)', r'\1\n\n    \2', content)
+    return content
+
+
+def optimize_content(content, footer):
+    """Apply all SEO optimizations to page content and return the result."""
+    content = remove_meta_keywords(content)
+    content = fix_breadcrumb_divs(content)
+    content = close_main(content)
+    content = add_seo_footer(content, footer)
+    return order_main_before_footer(content)
+
+
+def optimize_html(filepath, footer):
     """Apply SEO optimizations to a single HTML file."""
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
@@ -121,29 +213,7 @@ def optimize_html(filepath):
     if filename.startswith('google'):
         return False
 
-    # 1. Remove meta keywords tag (Google ignores it)
-    content = re.sub(r'\s*<meta name="keywords"[^>]*>\n?', '', content)
-
-    # 2. Fix stray closing divs after breadcrumb nav
-    content = re.sub(r'(</nav>)\s*</div>\s*</div>\s*\n', r'\1\n', content)
-
-    # 3. Add closing </main> tag if missing before </body>
-    if '<main>' in content or '<main ' in content:
-        if '</main>' not in content:
-            content = content.replace('</body>', '</main>\n</body>')
-
-    # 4. Add SEO footer before </body> if not present
-    if '<!-- SEO Footer -->' not in content:
-        # Remove any existing simple footer
-        content = re.sub(r'\s*<footer[^>]*>.*?</footer>\s*', '', content, flags=re.DOTALL)
-        # Add new SEO footer
-        content = content.replace('</body>', FOOTER_HTML + '\n</body>')
-
-    # 5. Ensure proper HTML structure
-    # Close any unclosed main tags before footer
-    if '</main>' in content and FOOTER_HTML.strip()[:20] in content:
-        # Make sure </main> comes before footer
-        content = re.sub(r'(</main>)\s*(<!-- SEO Footer -->)', r'\1\n\n    \2', content)
+    content = optimize_content(content, footer)
 
     if content != original:
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -155,11 +225,13 @@ def optimize_html(filepath):
 def main():
     """Process all HTML files."""
     script_dir = Path(__file__).parent
-    html_files = list(script_dir.glob('*.html'))
+    catalog = site_catalog.load(script_dir, CATEGORIES, load_script('seo-optimizer.py').CALCULATOR_SEO_DATA)
+    footer = build_footer(catalog)
+    html_files = [script_dir / filename for filename in catalog.filenames]
 
     modified = 0
     for filepath in html_files:
-        if optimize_html(filepath):
+        if optimize_html(filepath, footer):
             print(f"Optimized: {filepath.name}")
             modified += 1
         else:
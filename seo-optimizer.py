@@ -4,10 +4,14 @@ SEO Optimizer for FitCalcs pages
 Based on Google's SEO Starter Guide recommendations
 """
 
+import json
 import os
 import re
 from datetime import datetime
 
+from rewrite_guard import MemoSearch, guarded, iter_blocks, literal, replace_spans
+from site_catalog import SKIP_FILES, discover_pages
+
 # Calculator-specific SEO data for better optimization
 CALCULATOR_SEO_DATA = {
     'bmi-calculator': {
@@ -431,7 +435,7 @@ def get_seo_data(filename):
 
 def generate_schema(filename, seo_data):
     """Generate JSON-LD structured data"""
-    name = get_calculator_name(filename)
+    name = seo_data.get('name') or get_calculator_name(filename)
     url = f"https://fitcalcs.xyz/{filename}"
 
     # WebApplication schema
@@ -478,22 +482,24 @@ def generate_schema(filename, seo_data):
         "mainEntity": faq_items
     }
 
-    # Breadcrumb schema
+    # Breadcrumb schema; pages generated from a calculator (landing pages)
+    # name it in seo_data['parent'] and sit below it in the trail
+    trail = [("Home", "https://fitcalcs.xyz/")]
+    parent = seo_data.get('parent')
+    if parent:
+        parent_name = get_seo_data(parent).get('name') or get_calculator_name(parent)
+        trail.append((parent_name, f"https://fitcalcs.xyz/{parent}"))
+    trail.append((name, url))
     breadcrumb = {
         "@type": "BreadcrumbList",
         "itemListElement": [
             {
                 "@type": "ListItem",
-                "position": 1,
-                "name": "Home",
-                "item": "https://fitcalcs.xyz/"
-            },
-            {
-                "@type": "ListItem",
-                "position": 2,
-                "name": name,
-                "item": url
+                "position": position,
+                "name": item_name,
+                "item": item_url
             }
+            for position, (item_name, item_url) in enumerate(trail, 1)
         ]
     }
 
@@ -521,26 +527,28 @@ def generate_schema(filename, seo_data):
 
     return schema
 
-def generate_meta_tags(filename, seo_data):
+def generate_meta_tags(filename, seo_data, include_keywords=True):
     """Generate all meta tags for the page"""
     name = get_calculator_name(filename)
     url = f"https://fitcalcs.xyz/{filename}"
     title = seo_data.get('title', f'{name} - Free Online Calculator | FitCalcs')
     description = seo_data.get('description', f'Free {name.lower()} for quick and accurate results.')
     keywords = ', '.join(seo_data.get('keywords', [name.lower(), 'calculator']))
+    keywords_tag = f'\n    <meta name="keywords" content="{keywords}">' if include_keywords else ''
+    # Near-duplicate pages point search engines at their cluster's canonical page
+    canonical = seo_data.get('canonical', url)
 
     meta_tags = f'''    <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
-    <meta name="description" content="{description}">
-    <meta name="keywords" content="{keywords}">
+    <meta name="description" content="{description}">{keywords_tag}
     <meta name="author" content="FitCalcs">
     <meta name="robots" content="index, follow, max-image-preview:large, max-snippet:-1, max-video-preview:-1">
-    <link rel="canonical" href="{url}">
+    <link rel="canonical" href="{canonical}">
 
     <!-- Open Graph / Facebook -->
     <meta property="og:type" content="website">
-    <meta property="og:url" content="{url}">
+    <meta property="og:url" content="{canonical}">
     <meta property="og:title" content="{title}">
     <meta property="og:description" content="{description}">
     <meta property="og:site_name" content="FitCalcs">
@@ -579,45 +587,17 @@ def generate_faq_html(faqs):
 
     return faq_html
 
-def optimize_page(filepath):
-    """Optimize a single page for SEO"""
-    filename = os.path.basename(filepath)
-    if filename in ['index.html', 'googlee9bcf971710c9c1b.html', 'CNAME']:
-        return False
-
-    print(f"Optimizing: {filename}")
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    seo_data = get_seo_data(filename)
-
+def rewrite_head(filename, content, seo_data, include_keywords=True):
+    """Replace the <head> section with generated meta tags and schema"""
     # Generate new meta tags
-    meta_tags = generate_meta_tags(filename, seo_data)
+    meta_tags = generate_meta_tags(filename, seo_data, include_keywords=include_keywords)
 
     # Generate new schema
     schema = generate_schema(filename, seo_data)
-    import json
     schema_json = json.dumps(schema, indent=4)
 
-    # Replace head section
-    # Find the head content between <head> and </head>
-    head_pattern = r'<head>.*?</head>'
-
     # Extract existing styles and scripts from head
-    style_match = re.search(r'(<style>.*?</style>)', content, re.DOTALL)
-    existing_style = style_match.group(1) if style_match else ''
-
-    # Find ad scripts in head
-    ad_scripts = []
-    ad_pattern = r'<script[^>]*(?:quge5|nap5k|highperformance)[^>]*>.*?</script>'
-    for match in re.finditer(ad_pattern, content, re.DOTALL):
-        ad_scripts.append(match.group(0))
-
-    # Also capture inline ad scripts
-    inline_ad = re.search(r"<script>\(function\(s\)\{s\.dataset\.zone.*?</script>", content, re.DOTALL)
-    if inline_ad:
-        ad_scripts.append(inline_ad.group(0))
+    existing_style = guarded(_find_style, _find_style_linear, content, blocks=[('<style>', '</style>')])
 
     # Build new head
     new_head = f'''<head>
@@ -631,29 +611,121 @@ def optimize_page(filepath):
 </head>'''
 
     # Replace head section
-    content = re.sub(head_pattern, new_head, content, flags=re.DOTALL)
+    def replace_head(content):
+        return re.sub(r'<head>.*?</head>', lambda m: new_head, content, count=1, flags=re.DOTALL)
 
-    # Update FAQ section with page-specific FAQs
+    def replace_head_linear(content):
+        head = next(iter_blocks(content, '<head>', '</head>', attrs=False), None)
+        return replace_spans(content, [head] if head else [], new_head)
+
+    return guarded(replace_head, replace_head_linear, content, blocks=[('<head>', '</head>')])
+
+def _find_style(content):
+    style_match = re.search(r'(<style>.*?</style>)', content, re.DOTALL)
+    return style_match.group(1) if style_match else ''
+
+def _find_style_linear(content):
+    for start, end in iter_blocks(content, '<style>', '</style>', attrs=False):
+        return content[start:end]
+    return ''
+
+FAQ_PATTERN = r'<div class="card"[^>]*>\s*<h2>[^<]*(?:FAQ|Frequently Asked)[^<]*</h2>.*?</div>\s*</div>'
+_FAQ_HEADING = re.compile(r'\s*<h2>([^<]*)</h2>', re.IGNORECASE)
+_FAQ_TITLE = re.compile(r'FAQ|Frequently Asked', re.IGNORECASE)
+_CARD_END = re.compile(r'</div>\s*</div>', re.IGNORECASE)
+
+def _faq_spans_linear(content):
+    """Spans matched by FAQ_PATTERN, found with forward scans only"""
+    cards = MemoSearch(content, literal('<div class="card"', ignore_case=True))
+    tag_ends = MemoSearch(content, literal('>'))
+    card_ends = MemoSearch(content, _CARD_END)
+    heading_at, heading = None, None
+    pos = 0
+    while True:
+        card = cards.search(pos)
+        if card is None:
+            return
+        tag_end = tag_ends.search(card.end())
+        if tag_end is None:
+            return
+        # Cards opened before the same '>' share one heading
+        if tag_end.end() != heading_at:
+            heading_at = tag_end.end()
+            heading = _FAQ_HEADING.match(content, heading_at)
+        if heading is None or not _FAQ_TITLE.search(heading.group(1)):
+            pos = card.start() + 1
+            continue
+        end = card_ends.search(heading.end())
+        if end is None:
+            return
+        yield card.start(), end.end()
+        pos = end.end()
+
+def rewrite_faq(content, seo_data):
+    """Update FAQ section with page-specific FAQs"""
     faqs = seo_data.get('faqs', DEFAULT_SEO['faqs'])
     new_faq_html = generate_faq_html(faqs)
 
     # Find and replace existing FAQ section
-    faq_pattern = r'<div class="card"[^>]*>\s*<h2>[^<]*(?:FAQ|Frequently Asked)[^<]*</h2>.*?</div>\s*</div>'
-    if re.search(faq_pattern, content, re.DOTALL | re.IGNORECASE):
-        content = re.sub(faq_pattern, new_faq_html, content, flags=re.DOTALL | re.IGNORECASE)
-
-    # Ensure proper h1 tag (only one per page)
+    def replace_faq(content):
+        if re.search(FAQ_PATTERN, content, re.DOTALL | re.IGNORECASE):
+            content = re.sub(FAQ_PATTERN, lambda m: new_faq_html, content, flags=re.DOTALL | re.IGNORECASE)
+        return content
+
+    def replace_faq_linear(content):
+        return replace_spans(content, _faq_spans_linear(content), new_faq_html)
+
+    return guarded(replace_faq, replace_faq_linear, content,
+                   blocks=[('<div class="card"', _CARD_END)])
+
+def _h1_demoter():
+    """Replacement that keeps the first h1 block and turns the others into h2"""
+    first_h1 = True
+    def replace_extra_h1(block):
+        nonlocal first_h1
+        if first_h1:
+            first_h1 = False
+            return block
+        return block.replace('<h1', '<h2').replace('</h1>', '</h2>')
+    return replace_extra_h1
+
+def _demote_extra_h1(content):
     h1_count = len(re.findall(r'<h1[^>]*>', content))
     if h1_count > 1:
-        # Keep only the first h1, change others to h2
-        first_h1 = True
-        def replace_extra_h1(match):
-            nonlocal first_h1
-            if first_h1:
-                first_h1 = False
-                return match.group(0)
-            return match.group(0).replace('<h1', '<h2').replace('</h1>', '</h2>')
-        content = re.sub(r'<h1[^>]*>.*?</h1>', replace_extra_h1, content, flags=re.DOTALL)
+        replace_extra_h1 = _h1_demoter()
+        content = re.sub(r'<h1[^>]*>.*?</h1>', lambda m: replace_extra_h1(m.group(0)), content, flags=re.DOTALL)
+    return content
+
+def _demote_extra_h1_linear(content):
+    # An <h1 counts once some '>' follows it, as <h1[^>]*> requires
+    h1_count = content.count('<h1', 0, max(content.rfind('>'), 0))
+    if h1_count > 1:
+        content = replace_spans(content, iter_blocks(content, '<h1', '</h1>'), _h1_demoter())
+    return content
+
+def demote_extra_h1(content):
+    """Ensure proper h1 tag (only one per page)"""
+    return guarded(_demote_extra_h1, _demote_extra_h1_linear, content, blocks=[('<h1', '</h1>')])
+
+def optimize_content(filename, content, include_keywords=True):
+    """Apply head, FAQ and h1 rewrites to page content and return the result"""
+    seo_data = get_seo_data(filename)
+    content = rewrite_head(filename, content, seo_data, include_keywords=include_keywords)
+    content = rewrite_faq(content, seo_data)
+    return demote_extra_h1(content)
+
+def optimize_page(filepath):
+    """Optimize a single page for SEO"""
+    filename = os.path.basename(filepath)
+    if filename in SKIP_FILES:
+        return False
+
+    print(f"Optimizing: {filename}")
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    content = optimize_content(filename, content)
 
     # Write optimized content
     with open(filepath, 'w', encoding='utf-8') as f:
@@ -661,8 +733,8 @@ def optimize_page(filepath):
 
     return True
 
-def generate_sitemap():
-    """Generate sitemap.xml"""
+def generate_sitemap(site_dir='.', exclude=(), pages=None):
+    """Generate sitemap.xml for pages (default: the pages in site_dir), leaving out the pages in exclude"""
     sitemap = '''<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
@@ -681,8 +753,8 @@ def generate_sitemap():
 '''
 
     # Add all calculator pages
-    for filename in sorted(os.listdir('.')):
-        if filename.endswith('.html') and filename not in ['index.html', 'googlee9bcf971710c9c1b.html']:
+    for filename in pages if pages is not None else discover_pages(site_dir):
+        if filename not in exclude:
             sitemap += f'''    <url>
         <loc>https://fitcalcs.xyz/{filename}</loc>
         <lastmod>{today}</lastmod>
@@ -693,25 +765,25 @@ def generate_sitemap():
 
     sitemap += '</urlset>'
 
-    with open('sitemap.xml', 'w', encoding='utf-8') as f:
+    with open(os.path.join(site_dir, 'sitemap.xml'), 'w', encoding='utf-8') as f:
         f.write(sitemap)
 
     print("Generated sitemap.xml")
 
-def generate_robots_txt():
+def generate_robots_txt(site_dir='.', extra_sitemaps=()):
     """Generate robots.txt"""
-    robots = '''# Robots.txt for FitCalcs
+    sitemaps = ''.join(f'Sitemap: https://fitcalcs.xyz/{name}\n' for name in ('sitemap.xml', *extra_sitemaps))
+    robots = f'''# Robots.txt for FitCalcs
 User-agent: *
 Allow: /
 
 # Sitemap
-Sitemap: https://fitcalcs.xyz/sitemap.xml
-
+{sitemaps}
 # Crawl-delay (optional, be nice to servers)
 Crawl-delay: 1
 '''
 
-    with open('robots.txt', 'w', encoding='utf-8') as f:
+    with open(os.path.join(site_dir, 'robots.txt'), 'w', encoding='utf-8') as f:
         f.write(robots)
 
     print("Generated robots.txt")
@@ -720,11 +792,10 @@ def main():
     """Main function to optimize all pages"""
     count = 0
 
-    for filename in os.listdir('.'):
-        if filename.endswith('.html'):
-            filepath = os.path.join('.', filename)
-            if optimize_page(filepath):
-                count += 1
+    for filename in discover_pages('.'):
+        filepath = os.path.join('.', filename)
+        if optimize_page(filepath):
+            count += 1
 
     generate_sitemap()
     generate_robots_txt()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+SEO build pipeline for FitCalcs
+Runs the transforms from seo-optimizer.py and seo-optimize.py in a single
+pass: each page is read once, rewritten in memory and written once.
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import site_catalog
+from site_catalog import load_script
+
+SCRIPT_DIR = Path(__file__).parent
+
+optimizer = load_script('seo-optimizer.py')
+optimize = load_script('seo-optimize.py')
+landing = load_script('landing-pages.py')
+cache_headers = load_script('cache-headers.py')
+rum = load_script('rum-monitor.py')
+changeset = load_script('deploy-changeset.py')
+duplicates = load_script('near-duplicates.py')
+render_hints = load_script('render-hints.py')
+live_timer = load_script('live-timer.py')
+
+
+def build_transforms(footer, canonicals=None, rum_endpoint=None, rum_sample_rate=rum.DEFAULT_SAMPLE_RATE):
+    """Return the ordered list of (name, transform) pairs applied to each page.
+
+    Every transform takes (filename, content) and returns new content. The
+    head is generated without a keywords tag, so the keyword stripping step
+    from seo-optimize.py is not needed. Rendering hints are added once the
+    FAQ and footer are in place. The live-update scheduler and the RUM
+    beacon are added after the head is rebuilt, so building without
+    rum_endpoint removes the beacon again.
+    footer is the SEO footer built from the site catalog. canonicals maps
+    near-duplicate pages to the page their canonical link should point at.
+    """
+    canonicals = canonicals or {}
+
+    def head(filename, content):
+        seo_data = optimizer.get_seo_data(filename)
+        if filename in canonicals:
+            seo_data = dict(seo_data, canonical=f'https://fitcalcs.xyz/{canonicals[filename]}')
+        return optimizer.rewrite_head(filename, content, seo_data, include_keywords=False)
+
+    def faq(filename, content):
+        return optimizer.rewrite_faq(content, optimizer.get_seo_data(filename))
+
+    transforms = [
+        ('head', head),
+        ('faq', faq),
+        ('h1', lambda filename, content: optimizer.demote_extra_h1(content)),
+        ('breadcrumb', lambda filename, content: optimize.fix_breadcrumb_divs(content)),
+        ('main', lambda filename, content: optimize.close_main(content)),
+        ('footer', lambda filename, content: optimize.add_seo_footer(content, footer)),
+        ('footer-order', lambda filename, content: optimize.order_main_before_footer(content)),
+        ('render', lambda filename, content: render_hints.optimize_content(content)),
+        ('timer', lambda filename, content: live_timer.inject_scheduler(content)),
+    ]
+    if rum_endpoint:
+        transforms.append(('rum', lambda filename, content: rum.inject_beacon(content, rum_endpoint, rum_sample_rate)))
+    return transforms
+
+
+def process_page(filepath, transforms, dry_run=False, original=None):
+    """Read a page once, apply every transform and write it back if changed
+
+    original is the page content when the caller has already read it.
+    Returns (changed, content) so later stages can reuse the page in memory.
+    """
+    if original is None:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            original = f.read()
+
+    content = original
+    filename = os.path.basename(filepath)
+    for _name, transform in transforms:
+        content = transform(filename, content)
+
+    if content == original:
+        return False, content
+    if not dry_run:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return True, content
+
+
+def run_pipeline(site_dir='.', dry_run=False, landing_workers=0,
+                 rum_endpoint=None, rum_sample_rate=rum.DEFAULT_SAMPLE_RATE):
+    """Process all pages in site_dir, regenerate sitemap.xml, robots.txt and
+    _headers, and plan the deploy changeset against the last deploy
+
+    Pages are read once, into the site catalog. Near-duplicate clusters are
+    found first: duplicates get their cluster's canonical URL, are left out
+    of sitemap.xml and are folded into their canonical page in the link
+    graph. Catalog records are refreshed from the rewritten pages before the
+    catalog cache is saved. The SEO footer is built from the catalog, and
+    _headers and the deploy manifest use its page content and digests.
+
+    With landing_workers > 0 the programmatic landing pages are generated as
+    well, their links are merged into the link graph and their sitemap index
+    is listed in robots.txt; without it, landing pages from earlier builds
+    are removed. With rum_endpoint
+    set, every page reports Web Vitals to it for a sample_rate share of views.
+    """
+    catalog = site_catalog.load(site_dir, optimize.CATEGORIES, optimizer.CALCULATOR_SEO_DATA, write_cache=False)
+    pages = catalog.filenames
+    clusters = duplicates.find_clusters(catalog)
+    canonicals = duplicates.canonical_map(clusters)
+    transforms = build_transforms(optimize.build_footer(catalog), canonicals, rum_endpoint, rum_sample_rate)
+
+    modified = 0
+    link_graph = None if dry_run else duplicates.LinkGraphWriter(site_dir, canonicals)
+    for filename in pages:
+        changed, content = process_page(os.path.join(site_dir, filename), transforms, dry_run=dry_run,
+                                        original=catalog.content(filename))
+        if link_graph:
+            link_graph.add(filename, content)
+        if changed:
+            catalog.refresh(filename, content)
+            print(f"Optimized: {filename}")
+            modified += 1
+
+    # The home page keeps its own head and footer but gets the rendering hints,
+    # and the beacon is added or removed the way the head rebuild does it for
+    # the calculator pages
+    home = os.path.join(site_dir, site_catalog.HOME_PAGE)
+    if os.path.exists(home):
+        home_transforms = [
+            ('render', lambda filename, content: render_hints.optimize_content(content)),
+            ('rum', (lambda filename, content: rum.inject_beacon(content, rum_endpoint, rum_sample_rate))
+             if rum_endpoint else (lambda filename, content: rum.remove_beacon(content))),
+        ]
+        changed, home_content = process_page(home, home_transforms, dry_run=dry_run)
+        if changed:
+            print(f"Optimized: {site_catalog.HOME_PAGE}")
+
+    if not dry_run:
+        extra_sitemaps = []
+        if landing_workers:
+            extra_sitemaps.append(landing.build_landing_pages(site_dir, landing_workers, rum_endpoint, rum_sample_rate))
+            for path in landing.link_files(site_dir):
+                link_graph.add_edges(path)
+        else:
+            landing.remove_landing_pages(site_dir)
+        link_graph.close()
+        duplicates.write_clusters(site_dir, clusters)
+        catalog.save(site_dir)
+        optimizer.generate_sitemap(site_dir, exclude=canonicals, pages=pages)
+        optimizer.generate_robots_txt(site_dir, extra_sitemaps)
+        contents = {filename: catalog.content(filename) for filename in pages}
+        if os.path.exists(home):
+            contents[site_catalog.HOME_PAGE] = home_content
+        cache_headers.generate_headers(site_dir, contents)
+        changeset.plan(site_dir, catalog.digests)
+
+    broken = catalog.broken_links(site_dir)
+    if broken:
+        print(f"Warning: {len(broken)} internal links to missing pages (python site_catalog.py --check-links)")
+
+    print(f"\nTotal files modified: {modified}/{len(pages)}")
+    return modified
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Run the FitCalcs SEO build pipeline')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR),
+                        help='directory containing the HTML pages')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report pages that would change without writing anything')
+    parser.add_argument('--landing', type=int, default=0, metavar='WORKERS',
+                        help='also generate landing pages using WORKERS shard processes')
+    parser.add_argument('--rum-endpoint', metavar='URL',
+                        help='inject the Web Vitals beacon, reporting to URL')
+    parser.add_argument('--rum-sample-rate', type=float, default=rum.DEFAULT_SAMPLE_RATE,
+                        help='share of page views that send a beacon (default: %(default)s)')
+    args = parser.parse_args()
+    run_pipeline(args.site_dir, dry_run=args.dry_run, landing_workers=args.landing,
+                 rum_endpoint=args.rum_endpoint, rum_sample_rate=args.rum_sample_rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Site catalog for FitCalcs
+One record per calculator page, indexed by filename, slug, footer category
+and canonical URL, so the build stages share a single view of the site
+instead of each listing the directory and re-reading pages. Records combine what the pages
+say (title, canonical link, internal links) with the footer categories from
+seo-optimize.py and the SEO data from seo-optimizer.py. The catalog keeps
+the pages it read for later stages, and the pipeline refreshes records from
+the pages it rewrites. The parsed page data is cached in .build/catalog.json
+and reused for every page whose content hash is unchanged.
+
+    python site_catalog.py
+    python site_catalog.py --check-links
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+SITE_URL = 'https://fitcalcs.xyz'
+
+BUILD_DIR = '.build'
+CACHE_FILE = 'catalog.json'
+# Bump when the parsed fields change, to drop old caches
+CACHE_VERSION = 1
+
+HOME_PAGE = 'index.html'
+# Files in the site directory that are not calculator pages
+SKIP_FILES = [HOME_PAGE, 'googlee9bcf971710c9c1b.html', 'CNAME']
+
+_TITLE = re.compile(r'<title>([^<]*)</title>')
+_CANONICAL = re.compile(r'<link rel="canonical" href="([^"]+)"')
+_LINK = re.compile(r'href="/?([\w-]+\.html)"')
+
+
+def discover_pages(site_dir='.'):
+    """Return the sorted calculator page filenames in site_dir"""
+    return sorted(
+        filename for filename in os.listdir(site_dir)
+        if filename.endswith('.html') and filename not in SKIP_FILES
+    )
+
+
+def page_links(content):
+    """Internal page filenames linked from a page, in order"""
+    return list(dict.fromkeys(_LINK.findall(content)))
+
+
+def parse_page(content):
+    """Return the cached fields of a page: title, canonical URL and internal links"""
+    title = _TITLE.search(content)
+    canonical = _CANONICAL.search(content)
+    return {
+        'title': title.group(1).strip() if title else '',
+        'canonical': canonical.group(1) if canonical else None,
+        'links': page_links(content),
+    }
+
+
+class Page:
+    """Catalog record for one calculator page"""
+
+    __slots__ = ('filename', 'slug', 'url', 'canonical', 'title', 'name', 'category', 'has_seo_data',
+                 'links', 'digest')
+
+    def __init__(self, filename, digest, parsed, category=None, name=None, has_seo_data=False):
+        self.filename = filename
+        self.slug = filename[:-len('.html')]
+        self.url = f'{SITE_URL}/{filename}'
+        self.canonical = parsed['canonical'] or self.url
+        self.title = parsed['title']
+        self.name = name or self.slug.replace('-', ' ').title()
+        self.category = category
+        self.has_seo_data = has_seo_data
+        self.links = tuple(parsed['links'])
+        self.digest = digest
+
+    def __repr__(self):
+        return f'Page({self.filename!r}, category={self.category!r})'
+
+
+def _entry(page):
+    """Cache entry for a page record"""
+    return {'title': page.title, 'canonical': page.canonical, 'links': list(page.links), 'digest': page.digest}
+
+
+def _decode(data):
+    """Page text as open(..., 'r') reads it"""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+class Catalog:
+    """Page records with lookups by filename, slug, category and canonical URL"""
+
+    def __init__(self, pages, contents=None, cached=None):
+        self.pages = pages
+        self.by_filename = {page.filename: page for page in pages}
+        self.by_slug = {page.slug: page for page in pages}
+        self.by_category = {}
+        self.by_canonical = {}
+        for page in pages:
+            self.by_category.setdefault(page.category, []).append(page)
+            self.by_canonical.setdefault(page.canonical, []).append(page)
+        # Page bytes read by load(), or text passed to refresh()
+        self._contents = contents or {}
+        self._cached = cached or {}
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, filename):
+        return filename in self.by_filename
+
+    @property
+    def filenames(self):
+        return [page.filename for page in self.pages]
+
+    def content(self, filename):
+        """Text of a page as last read or refreshed"""
+        data = self._contents[filename]
+        return _decode(data) if isinstance(data, bytes) else data
+
+    def refresh(self, filename, content):
+        """Replace a page's record with one parsed from its rewritten content"""
+        old = self.by_filename[filename]
+        page = Page(filename, hashlib.sha256(content.encode('utf-8')).hexdigest(), parse_page(content),
+                    category=old.category, name=old.name, has_seo_data=old.has_seo_data)
+        self.pages[self.pages.index(old)] = page
+        self.by_filename[filename] = page
+        self.by_slug[page.slug] = page
+        group = self.by_category[page.category]
+        group[group.index(old)] = page
+        # The canonical URL is parsed from the page, so it may have moved
+        group = self.by_canonical[old.canonical]
+        group.remove(old)
+        if not group:
+            del self.by_canonical[old.canonical]
+        self.by_canonical.setdefault(page.canonical, []).append(page)
+        self._contents[filename] = content
+
+    @property
+    def digests(self):
+        """{filename: SHA-256 of the page as last read or refreshed}"""
+        return {page.filename: page.digest for page in self.pages}
+
+    def save(self, site_dir='.'):
+        """Write the cache, unless it already holds these records"""
+        entries = {page.filename: _entry(page) for page in self.pages}
+        if entries == self._cached:
+            return
+        cache_path = os.path.join(site_dir, BUILD_DIR, CACHE_FILE)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'pages': entries}, f, indent=1, sort_keys=True)
+        self._cached = entries
+
+    def inbound_links(self):
+        """Return {filename: number of other pages linking to it}"""
+        inbound = {}
+        for page in self.pages:
+            for target in page.links:
+                if target != page.filename:
+                    inbound[target] = inbound.get(target, 0) + 1
+        return inbound
+
+    def broken_links(self, site_dir='.'):
+        """Return (source, target) pairs of internal links to pages that do not exist"""
+        return [
+            (page.filename, target)
+            for page in self.pages for target in page.links
+            if target not in self.by_filename and not os.path.exists(os.path.join(site_dir, target))
+        ]
+
+
+def load_script(filename):
+    """Load a sibling build script (hyphenated filename) as a module
+
+    Each script runs once per process; later calls return the same module.
+    """
+    path = SCRIPT_DIR / filename
+    name = path.stem.replace('-', '_')
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+@lru_cache(maxsize=None)
+def _site_metadata():
+    """Footer categories and SEO data, for callers that have not loaded the scripts"""
+    return load_script('seo-optimize.py').CATEGORIES, load_script('seo-optimizer.py').CALCULATOR_SEO_DATA
+
+
+def _read_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get('pages', {}) if cache.get('version') == CACHE_VERSION else {}
+
+
+def load(site_dir='.', categories=None, seo_data=None, write_cache=True):
+    """Build the catalog for site_dir, parsing only pages whose hash changed
+
+    categories and seo_data default to CATEGORIES from seo-optimize.py and
+    CALCULATOR_SEO_DATA from seo-optimizer.py. Callers that rewrite pages
+    pass write_cache=False and save() once the records are refreshed.
+    """
+    if categories is None or seo_data is None:
+        default_categories, default_seo_data = _site_metadata()
+        categories = default_categories if categories is None else categories
+        seo_data = default_seo_data if seo_data is None else seo_data
+    footer = {filename: (category, label) for category, links in categories.items() for filename, label in links}
+
+    cached = _read_cache(os.path.join(site_dir, BUILD_DIR, CACHE_FILE))
+    contents = {}
+    pages = []
+    for filename in discover_pages(site_dir):
+        with open(os.path.join(site_dir, filename), 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = cached.get(filename)
+        if not entry or entry['digest'] != digest:
+            entry = parse_page(_decode(data))
+        contents[filename] = data
+        category, label = footer.get(filename, (None, None))
+        pages.append(Page(filename, digest, entry, category=category, name=label,
+                          has_seo_data=filename[:-len('.html')] in seo_data))
+
+    catalog = Catalog(pages, contents, cached)
+    if write_cache:
+        catalog.save(site_dir)
+    return catalog
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Build the FitCalcs site catalog')
+    parser.add_argument('site_dir', nargs='?', default=str(SCRIPT_DIR))
+    parser.add_argument('--check-links', action='store_true', help='list internal links to missing pages')
+    args = parser.parse_args()
+
+    catalog = load(args.site_dir)
+    for category, pages in sorted(catalog.by_category.items(), key=lambda item: (item[0] is None, item[0] or '')):
+        print(f'{category or "Uncategorized"}: {len(pages)} pages')
+    print(f'{len(catalog)} pages, {len(catalog.by_canonical)} canonical URLs')
+
+    if args.check_links:
+        broken = catalog.broken_links(args.site_dir)
+        for source, target in broken:
+            print(f'  {source} -> {target}')
+        print(f'{len(broken)} broken internal links')
+
+
+if __name__ == '__main__':
+    main()